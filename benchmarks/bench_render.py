@@ -0,0 +1,345 @@
+"""Micro-benchmarks of the QR Code render pipeline.
+
+Times every stage on stand-in device and cable objects, so no NetBox
+instance is needed. Results are compared against benchmarks/baseline.json
+and the run fails if a stage got slower or allocates more than allowed.
+
+    python benchmarks/bench_render.py [--update] [--iterations N] [--cold]
+
+The import of the module is measured in fresh interpreters, the startup
+budget and the lazily imported modules are checked by the tests.
+"""
+import argparse
+import importlib
+import importlib.util
+import json
+import statistics
+import subprocess  # nosec
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Fresh interpreters started to measure the import time.
+IMPORT_RUNS = 20
+
+# Lengths of the names and serials of the stand-in objects.
+LENGTHS = {"short": 8, "medium": 32, "long": 120}
+
+DEVICE_CONFIG = {
+    "font": "Roboto-Regular",
+    "data_fields": ["name", "serial", "custom_field_data.asset", "url"],
+    "text_fields": ["name", "serial"],
+    "text_below_fields": ["name"],
+}
+CABLE_CONFIG = {
+    "font": "Roboto-Regular",
+    "data_fields": [
+        "label",
+        "termination_a",
+        "termination_b",
+        "type",
+        "length",
+        "url",
+    ],
+    "data_in_image": "label",
+    "text_fields": ["label"],
+    "text_below_fields": ["label"],
+}
+
+
+def import_netbox_qr():
+    """Import netbox_qr.netbox_qr without the plugin declaration, which needs NetBox."""
+    if "netbox_qr" not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            "netbox_qr",
+            ROOT / "netbox_qr" / "__init__.py",
+            submodule_search_locations=[str(ROOT / "netbox_qr")],
+        )
+        sys.modules["netbox_qr"] = importlib.util.module_from_spec(spec)
+    return importlib.import_module("netbox_qr.netbox_qr")
+
+
+def text_of_length(prefix, length):
+    """Return a string of the given length."""
+    return (prefix + "-" + "x" * length)[:length]
+
+
+def stand_in_device(length):
+    """Return an object with the attributes of a NetBox device."""
+    return SimpleNamespace(
+        name=text_of_length("switch", length),
+        serial=text_of_length("SN", length),
+        custom_field_data={"asset": text_of_length("AS", length)},
+    )
+
+
+def stand_in_cable(length):
+    """Return an object with the attributes of a NetBox cable."""
+
+    class Termination(SimpleNamespace):
+        """Interface, which is named like in NetBox."""
+
+        def __str__(self):
+            """Return the name of the interface."""
+            return self.name
+
+    return SimpleNamespace(
+        label=text_of_length("C", min(length, 12)),
+        termination_a=Termination(
+            name="GigabitEthernet1/0/1",
+            device=text_of_length("switch-a", length),
+        ),
+        termination_b=Termination(
+            name="Ethernet48", device=text_of_length("server-b", length)
+        ),
+        type="cat6",
+        length=3,
+        length_unit="m",
+    )
+
+
+def measure_import(trace):
+    """Import the module and print its import time or allocation.
+
+    tracemalloc slows the import down, so time and allocation are measured
+    in separate interpreters.
+    """
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter_ns()
+    import_netbox_qr()
+    elapsed = time.perf_counter_ns() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    print(json.dumps({"us": elapsed / 1000, "peak": peak}))
+
+
+def _import_child(measure):
+    """Run the import measurement in a fresh interpreter."""
+    output = subprocess.run(  # nosec
+        [sys.executable, __file__, "--measure-import", measure],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def run_import(runs=IMPORT_RUNS):
+    """Measure the import in fresh interpreters."""
+    children = [_import_child("time") for _ in range(runs)]
+    traced = _import_child("alloc")
+    timings = sorted(child["us"] for child in children)
+    result = {
+        "p50_us": round(statistics.median(timings), 1),
+        "p99_us": round(timings[-1], 1),
+        "alloc_kib": round(traced["peak"] / 1024, 1),
+    }
+    return result
+
+
+def stages(nq, name, config, obj):
+    """Return the stages to measure for one object as (name, function, reset).
+
+    reset clears the caches a stage would otherwise skip work with.
+    """
+    import segno  # pylint:disable=import-outside-toplevel
+
+    url = "https://netbox.example.com/dcim/{}/1234/".format(name)
+    data = nq.generate_data_from_fields(config, obj, "data_fields", url)
+    qr_image = segno.make(data, error="H").to_pil(scale=2, border=1)
+    rgb_image = nq.image_ensure_text_in_image(qr_image.copy(), config, obj)
+    label = nq.label_for_object(config, obj, data, with_text=True)
+    return [
+        (
+            "generate_data_from_fields",
+            lambda: nq.generate_data_from_fields(config, obj, "data_fields", url),
+            None,
+        ),
+        ("segno.make", lambda: segno.make(data, error="H"), None),
+        ("encode_qr", lambda: nq.encode_qr.__wrapped__(data), None),
+        (
+            "image_ensure_data_in_image",
+            lambda: nq.image_ensure_data_in_image(qr_image.copy(), config, obj),
+            None,
+        ),
+        (
+            "image_ensure_text_in_image/right",
+            lambda: nq.image_ensure_text_in_image(qr_image, config, obj, False),
+            None,
+        ),
+        (
+            "image_ensure_text_in_image/below",
+            lambda: nq.image_ensure_text_in_image(qr_image, config, obj, True),
+            None,
+        ),
+        ("pil2pngdatauri", lambda: nq.pil2pngdatauri(rgb_image), None),
+        # A whole render includes encoding, as for a label rendered the first time.
+        (
+            "render_label",
+            lambda: nq.render_label(config, label),
+            nq.encode_qr.cache_clear,
+        ),
+    ]
+
+
+def measure(function, iterations, reset=None):
+    """Return p50 and p99 in microseconds and the peak allocation in KiB."""
+    timings = []
+    for _ in range(iterations):
+        if reset is not None:
+            reset()
+        start = time.perf_counter_ns()
+        function()
+        timings.append((time.perf_counter_ns() - start) / 1000)
+    timings.sort()
+    if reset is not None:
+        reset()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "p50_us": round(statistics.median(timings), 1),
+        "p99_us": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 1),
+        "alloc_kib": round(peak / 1024, 1),
+    }
+
+
+def _resets(*resets):
+    """Return a function calling all given reset functions, None if there are none."""
+    resets = [reset for reset in resets if reset]
+    if not resets:
+        return None
+
+    def reset_all():
+        for reset in resets:
+            reset()
+
+    return reset_all
+
+
+def run(iterations, cold):
+    """Measure all stages for all objects."""
+    nq = import_netbox_qr()
+    results = {}
+    for length_name, length in LENGTHS.items():
+        for name, config, obj in (
+            ("device", DEVICE_CONFIG, stand_in_device(length)),
+            ("cable", CABLE_CONFIG, stand_in_cable(length)),
+        ):
+            for stage, function, reset in stages(nq, name, config, obj):
+                key = "{}/{}/{}".format(stage, name, length_name)
+                results[key] = measure(
+                    function, iterations, _resets(reset, cold and nq.font_cache_clear)
+                )
+    return results
+
+
+def matrix_report():
+    """Print the QR Code size with error level H and with the automatic level."""
+    nq = import_netbox_qr()
+    print("{:<20} {:>14} {:>14} {:>8}".format("object", "H", "auto", "bytes"))
+    for length_name, length in LENGTHS.items():
+        for name, config, obj in (
+            ("device", DEVICE_CONFIG, stand_in_device(length)),
+            ("cable", CABLE_CONFIG, stand_in_cable(length)),
+        ):
+            url = "https://netbox.example.com/dcim/{}/1234/".format(name)
+            data = nq.generate_data_from_fields(config, obj, "data_fields", url)
+            label = nq.label_for_object(config, obj, data)
+            sizes = [
+                nq.encode_label({**config, "error_level": level}, label)
+                for level in ("H", "auto")
+            ]
+            print(
+                "{:<20} {:>14} {:>14} {:>8}".format(
+                    "{}/{}".format(name, length_name),
+                    *("{} ({})".format(size.size, size.error) for size in sizes),
+                    len(data.encode("utf-8")),
+                )
+            )
+    print()
+
+
+def compare(results, baseline, tolerance):
+    """Print the results and return the stages which regressed.
+
+    Stages missing from the baseline are reported as well, a baseline from
+    an older version must be updated.
+    """
+    regressions = []
+    print("{:<52} {:>10} {:>10} {:>10}".format("stage", "p50 us", "p99 us", "KiB"))
+    for key, result in results.items():
+        print(
+            "{:<52} {:>10} {:>10} {:>10}".format(
+                key, result["p50_us"], result["p99_us"], result["alloc_kib"]
+            )
+        )
+        expected = baseline.get(key)
+        if expected is None:
+            regressions.append("{}: not in the baseline".format(key))
+            continue
+        for metric in ("p50_us", "alloc_kib"):
+            if result[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(
+                    "{} {}: {} > {}".format(
+                        key, metric, result[metric], expected[metric]
+                    )
+                )
+    return regressions
+
+
+def main():
+    """Run the benchmarks and compare them against the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--cold", action="store_true", help="clear the font caches before each run"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown against the baseline, 0.25 is 25%%",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--measure-import", choices=("time", "alloc"), help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        "--update", action="store_true", help="store the results as new baseline"
+    )
+    args = parser.parse_args()
+    if args.measure_import:
+        measure_import(args.measure_import == "alloc")
+        return 0
+
+    matrix_report()
+    results = {"import": run_import()}
+    results.update(run(args.iterations, args.cold))
+    if args.update:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print("Baseline written to {}.".format(args.baseline))
+        return 0
+    if not args.baseline.exists():
+        compare(results, {}, args.tolerance)
+        print(
+            "\nNo baseline at {}, record one on the machine running the "
+            "benchmarks with --update.".format(args.baseline)
+        )
+        return 2
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions:\n" + "\n".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,32 @@ class QRConfig(PluginConfig):
     required_settings = []
     default_settings = {
         "with_text": True,
+        "cache_timeout": 86400,
+        "browser_cache_timeout": 3600,
+        "render_store": None,
+        "render_store_max_size": 1073741824,
+        "image_format": "png",
+        "error_level": "auto",
+        "compact_data": False,
+        "png_mode": "1",
+        "png_profile": "speed",
+        "export_png_profile": "size",
+        "png_compress_level": None,
+        "png_compress_strategy": None,
+        "render_workers": None,
+        "async_render": False,
+        "render_threads": 4,
+        "render_queue": 16,
+        "render_chunksize": 16,
+        "background_threshold": 1000,
+        "export_job_timeout": 3600,
+        "export_retention": 86400,
+        "api_max_objects": 1000,
+        "sheet_page_size": "A4",
+        "sheet_columns": 3,
+        "sheet_rows": 8,
+        "sheet_margins": [12.9, 7.2, 12.9, 7.2],
+        "sheet_spacing": [2.5, 0],
         "font": "Roboto-Regular",
         "data_fields": ["name", "serial", "url"],
         "text_fields": ["name", "serial"],
@@ -35,5 +61,14 @@ class QRConfig(PluginConfig):
     }
     caching_config = {}
 
+    def ready(self):
+        """Connect the signal handlers and resolve the config of every model."""
+        # pylint:disable=import-outside-toplevel,unused-import
+        super().ready()
+        from . import signals  # noqa: F401
+        from .render import model_configs
+
+        model_configs()
+
 
 config = QRConfig  # pylint:disable=invalid-name
@@ -0,0 +1 @@
+"""REST API of the netbox_qr plugin."""
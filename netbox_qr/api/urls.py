@@ -0,0 +1,7 @@
+"""REST API URLs of the netbox_qr plugin, served below /api/plugins/qr/."""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("<str:model>/", views.QRCodeRenderView.as_view(), name="qrcode_render"),
+]
@@ -0,0 +1,120 @@
+"""REST API views of the netbox_qr plugin."""
+from uuid import uuid4
+from django.http import Http404, QueryDict, StreamingHttpResponse
+from netbox.api.authentication import IsAuthenticatedOrLoginNotRequired
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from ..labels import cached_images, iter_zip, json_results, label_name
+from ..prefetch import iterate_planned
+from ..render import IMAGE_FORMATS, model_config
+from ..template_content import get_supported_model
+from ..views import InvalidSelection, bulk_image_format, select_objects
+
+# Formats the rendered QR Codes can be returned in. They are not named by
+# format, which REST framework takes for content negotiation.
+RESPONSE_FORMATS = ("json", "zip", "multipart")
+
+
+def _parameter(value):
+    """Convert a JSON value to a query parameter, true stays true."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def iter_multipart(images, boundary, content_type, extension):
+    """Generate a multipart/mixed body with one part per QR Code."""
+    for obj, image in images:
+        yield (
+            "--{}\r\nContent-Type: {}\r\n"
+            'Content-Disposition: attachment; filename="{}.{}"\r\n'
+            "X-Object-ID: {}\r\n\r\n".format(
+                boundary, content_type, label_name(obj), extension, obj.pk
+            )
+        ).encode("utf-8")
+        yield image
+        yield b"\r\n"
+    yield "--{}--\r\n".format(boundary).encode("utf-8")
+
+
+class QRCodeRenderView(APIView):
+    """Render the QR Codes of many objects in one request.
+
+    Objects are selected by id and the filters of the model's API, e.g.
+    ?id=1&id=2 or ?site=dc1. output is json (base64 images, default), zip or
+    multipart.
+    """
+
+    permission_classes = [IsAuthenticatedOrLoginNotRequired]
+
+    def get(self, request, model):
+        """Render the objects selected by the query parameters."""
+        return self.render_qrcodes(request, model, request.query_params)
+
+    def post(self, request, model):
+        """Render the objects selected by the body, for id lists too long for URLs."""
+        if isinstance(request.data, QueryDict):
+            return self.render_qrcodes(request, model, request.data)
+        if not isinstance(request.data, dict):
+            raise ValidationError("The body must be an object of parameters.")
+        parameters = QueryDict(mutable=True)
+        for key, value in request.data.items():
+            values = value if isinstance(value, list) else [value]
+            parameters.setlist(key, [_parameter(item) for item in values])
+        return self.render_qrcodes(request, model, parameters)
+
+    def render_qrcodes(  # pylint:disable=too-many-locals
+        self, request, model, parameters
+    ):
+        """Return the QR Codes of the selected objects in the requested format."""
+        model_class = get_supported_model(model)
+        config = model_config(model)
+        if model_class is None or config is None:
+            raise Http404
+        output_format = parameters.get("output", "json")
+        if output_format not in RESPONSE_FORMATS:
+            raise ValidationError({"output": "Must be json, zip or multipart."})
+        try:
+            image_format = bulk_image_format(config, parameters)
+            queryset, count = select_objects(request, model_class, config, parameters)
+        except InvalidSelection as error:
+            raise ValidationError(error.args[0]) from error
+        with_text = parameters.get("with_text") == "true"
+        text_below = parameters.get("text_below") == "true"
+
+        images = cached_images(
+            config,
+            iterate_planned(queryset, config),
+            request.build_absolute_uri("/"),
+            with_text,
+            text_below,
+            image_format,
+        )
+        content_type = IMAGE_FORMATS[image_format]
+        if output_format == "json":
+            return Response(
+                json_results(
+                    count,
+                    content_type,
+                    ((obj, label_name(obj), image) for obj, image in images),
+                )
+            )
+        if output_format == "zip":
+            response = StreamingHttpResponse(
+                iter_zip(
+                    ((label_name(obj), image) for obj, image in images),
+                    model,
+                    image_format,
+                ),
+                content_type="application/zip",
+            )
+            response["Content-Disposition"] = 'attachment; filename="qr-{}.zip"'.format(
+                model
+            )
+            return response
+        boundary = uuid4().hex
+        return StreamingHttpResponse(
+            iter_multipart(images, boundary, content_type, image_format),
+            content_type="multipart/mixed; boundary={}".format(boundary),
+        )
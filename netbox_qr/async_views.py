@@ -0,0 +1,210 @@
+"""Views rendering QR Codes in a thread pool, for NetBox served by ASGI.
+
+Django before 4.1 only runs function based views asynchronously. The
+database is used through sync_to_async, only the rendering itself runs in
+the bounded executor.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from .labels import json_results, label_name
+from .prefetch import iterate_planned
+from .render import (
+    IMAGE_FORMATS,
+    keep_image,
+    lookup_image,
+    lookup_images,
+    model_config,
+    render_image,
+)
+from .template_content import get_supported_model
+from .views import (
+    InvalidSelection,
+    body_response,
+    bulk_image_format,
+    image_headers,
+    image_request,
+    select_objects,
+)
+
+# Seconds clients are asked to wait, when all render slots are taken.
+RETRY_AFTER = 1
+
+
+class RenderQueueFull(Exception):
+    """All render slots of this process are taken."""
+
+
+def _plugin_setting(name):
+    """Return a plugin wide setting."""
+    return settings.PLUGINS_CONFIG.get("netbox_qr", {}).get(name)
+
+
+@lru_cache(maxsize=1)
+def render_executor():
+    """Return the thread pool rendering QR Codes for the async views."""
+    return ThreadPoolExecutor(
+        max_workers=_plugin_setting("render_threads"),
+        thread_name_prefix="netbox_qr",
+    )
+
+
+@lru_cache(maxsize=1)
+def render_slots():
+    """Return the semaphore limiting the renders running or queued in this process."""
+    return threading.BoundedSemaphore(_plugin_setting("render_queue"))
+
+
+async def render_concurrently(jobs):
+    """Render (config, label, model, with_text, text_below, image_format) jobs.
+
+    Takes as many free render slots as there are jobs, up to one per
+    thread, and renders the jobs with them. Raises RenderQueueFull if no
+    slot is free, so QR Codes cannot starve other requests.
+    """
+    slots = render_slots()
+    taken = 0
+    while taken < min(len(jobs), _plugin_setting("render_threads")):
+        if not slots.acquire(blocking=False):
+            break
+        taken += 1
+    if jobs and not taken:
+        raise RenderQueueFull
+    loop = asyncio.get_running_loop()
+    results = [None] * len(jobs)
+    queue = iter(range(len(jobs)))
+
+    async def worker():
+        for index in queue:
+            results[index] = await loop.run_in_executor(
+                render_executor(), render_image, *jobs[index]
+            )
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(taken)))
+    finally:
+        for _ in range(taken):
+            slots.release()
+    return results
+
+
+def queue_full():
+    """Answer that the server is too busy to render now."""
+    response = HttpResponse("Too many QR Codes are being rendered.", status=503)
+    response["Retry-After"] = str(RETRY_AFTER)
+    return response
+
+
+async def qrcode_image(request, model, pk, image_format):
+    """Return the QR Code of an object as PNG or SVG image."""
+    image = await sync_to_async(image_request)(request, model, pk, image_format)
+    response = get_conditional_response(
+        request, etag=image.etag, last_modified=image.last_modified
+    )
+    if response is None:
+        body, label, key = await sync_to_async(lookup_image)(image)
+        if body is None:
+            job = (
+                image.config,
+                label,
+                model,
+                image.with_text,
+                image.text_below,
+                image.image_format,
+            )
+            try:
+                (body,) = await render_concurrently([job])
+            except RenderQueueFull:
+                return queue_full()
+            await sync_to_async(keep_image)(image, key, body)
+        response = body_response(body, image)
+    return image_headers(response, image)
+
+
+def _select_objects(request, model, config):
+    """Look up the rendered images of the objects of a bulk request.
+
+    Returns the image format, the number of objects and (image request,
+    content, label, store key, name) of each object. The names are taken
+    here, as str() of an object may query the database.
+    """
+    image_format = bulk_image_format(config, request.GET)
+    queryset, count = select_objects(
+        request, get_supported_model(model), config, request.GET
+    )
+    images = lookup_images(
+        config,
+        iterate_planned(queryset, config),
+        request.build_absolute_uri("/"),
+        request.GET.get("with_text") == "true",
+        request.GET.get("text_below") == "true",
+        image_format,
+    )
+    return (
+        image_format,
+        count,
+        [
+            (image, content, label, key, label_name(image.obj))
+            for image, content, label, key in images
+        ],
+    )
+
+
+def _keep_images(images):
+    """Keep rendered images, given as (image request, store key, content)."""
+    for image, key, content in images:
+        keep_image(image, key, content)
+
+
+async def qrcode_images(request, model):
+    """Return the QR Codes of all filtered objects like the REST API as JSON.
+
+    Missing QR Codes are rendered concurrently.
+    """
+    config = model_config(model)
+    if config is None:
+        raise Http404
+    try:
+        image_format, count, selected = await sync_to_async(_select_objects)(
+            request, model, config
+        )
+    except InvalidSelection as error:
+        return JsonResponse(error.args[0], status=400, safe=False)
+    missing = [entry for entry in selected if entry[1] is None]
+    try:
+        rendered = await render_concurrently(
+            [
+                (
+                    config,
+                    label,
+                    model,
+                    image.with_text,
+                    image.text_below,
+                    image_format,
+                )
+                for image, _, label, _, _ in missing
+            ]
+        )
+    except RenderQueueFull:
+        return queue_full()
+    kept = [
+        (image, key, content)
+        for (image, _, _, key, _), content in zip(missing, rendered)
+    ]
+    await sync_to_async(_keep_images)(kept)
+    contents = {id(image): content for image, _, content in kept}
+    return JsonResponse(
+        json_results(
+            count,
+            IMAGE_FORMATS[image_format],
+            (
+                (image.obj, name, content or contents[id(image)])
+                for image, content, _, _, name in selected
+            ),
+        )
+    )
@@ -0,0 +1,51 @@
+"""Caching of rendered QR Codes in the configured Django cache."""
+import hashlib
+import json
+from uuid import uuid4
+from django.core.cache import cache
+
+CACHE_PREFIX = "netbox_qr"
+
+
+def _object_token_key(model, pk):
+    """Return the cache key holding the token of an object."""
+    return f"{CACHE_PREFIX}:object:{model}:{pk}"
+
+
+def object_token(model, pk):
+    """Return the cache token of an object, it changes whenever the object is saved."""
+    return cache.get_or_set(_object_token_key(model, pk), uuid4().hex, None)
+
+
+def invalidate_object(model, pk):
+    """Forget all rendered QR Codes of an object."""
+    cache.delete(_object_token_key(model, pk))
+
+
+def render_key(  # pylint:disable=too-many-arguments
+    obj, data, config, with_text, text_below, image_format="png"
+):
+    """Generate the cache key for a rendered QR Code of the given object."""
+    model = obj._meta.label_lower
+    content = json.dumps(
+        [
+            object_token(model, obj.pk),
+            data,
+            config.fingerprint,
+            with_text,
+            text_below,
+            image_format,
+        ]
+    )
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}:render:{digest}"
+
+
+def get_rendered(key):
+    """Return a cached rendered QR Code or None."""
+    return cache.get(key)
+
+
+def set_rendered(key, value, timeout):
+    """Store a rendered QR Code."""
+    cache.set(key, value, timeout)
@@ -0,0 +1,74 @@
+"""Background jobs of the netbox_qr plugin."""
+import tempfile
+from datetime import timedelta
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from rq import get_current_job
+from .labels import export_labels
+from .prefetch import iterate_planned
+from .render import model_config
+from .template_content import get_supported_model
+
+EXPORT_PATH = "netbox_qr/exports/"
+# Save the progress of a job only every this many labels.
+PROGRESS_INTERVAL = 100
+
+
+def export_file_name(job_id, output_format):
+    """Return the storage path of the export of a job."""
+    return "{}{}.{}".format(EXPORT_PATH, job_id, output_format)
+
+
+def delete_old_exports(max_age):
+    """Delete exports which are older than max_age seconds."""
+    try:
+        _, files = default_storage.listdir(EXPORT_PATH)
+    except FileNotFoundError:
+        return
+    expired = timezone.now() - timedelta(seconds=max_age)
+    for name in files:
+        if default_storage.get_modified_time(EXPORT_PATH + name) < expired:
+            default_storage.delete(EXPORT_PATH + name)
+
+
+def export_labels_job(  # pylint:disable=too-many-arguments
+    model, pk_list, base_url, with_text, text_below, output_format
+):
+    """Render the labels of the given objects into a file in the default storage."""
+    job = get_current_job()
+    config = model_config(model)
+    delete_old_exports(config.get("export_retention"))
+
+    total = len(pk_list)
+    job.meta["progress"] = {"rendered": 0, "total": total}
+    job.save_meta()
+
+    def progress(rendered):
+        if rendered % PROGRESS_INTERVAL == 0 or rendered == total:
+            job.meta["progress"] = {"rendered": rendered, "total": total}
+            job.save_meta()
+
+    objects = iterate_planned(
+        get_supported_model(model).objects.filter(pk__in=pk_list), config
+    )
+    with tempfile.TemporaryFile() as output:
+        for chunk in export_labels(
+            config,
+            objects,
+            base_url,
+            model,
+            with_text,
+            text_below,
+            output_format,
+            progress,
+            workers=config.get("render_workers"),
+        ):
+            output.write(chunk)
+        output.seek(0)
+        path = default_storage.save(
+            export_file_name(job.id, output_format), File(output)
+        )
+    job.meta["path"] = path
+    job.save_meta()
+    return path
@@ -0,0 +1,186 @@
+"""Render the QR Codes of many objects into label files."""
+import base64
+import zipfile
+from collections import deque
+from urllib.parse import urljoin
+from django.utils.text import slugify
+from .netbox_qr import label_for_object, render_label_svg
+from .pdf import PDFWriter, label_sheet
+from .pool import render_many
+from .render import keep_image, lookup_images, qrcode_data
+
+LABEL_FORMATS = {"pdf": "application/pdf", "zip": "application/zip"}
+
+
+class StreamWriter:
+    """Write-only file object, which hands out the written data for streaming."""
+
+    def __init__(self):
+        """Start without data."""
+        self.chunks = []
+
+    def write(self, data):
+        """Collect the written data."""
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        """Nothing to flush, the data is handed out by pop()."""
+
+    def pop(self):
+        """Return and forget the data written so far."""
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def label_name(obj):
+    """Return the file name of the QR Code of an object, without extension."""
+    return "{}-{}".format(obj.pk, slugify(str(obj)))
+
+
+def json_results(count, content_type, images):
+    """Return the JSON answer of a bulk request, images are (obj, name, image)."""
+    return {
+        "count": count,
+        "content_type": content_type,
+        "results": [
+            {
+                "id": obj.pk,
+                "name": name,
+                "image": base64.b64encode(image).decode("ascii"),
+            }
+            for obj, name, image in images
+        ],
+    }
+
+
+def label_jobs(  # pylint:disable=too-many-arguments
+    config, objects, base_url, with_text, text_below, names
+):
+    """Collect the render jobs of all objects, their names are added to names."""
+    for obj in objects:
+        url = urljoin(base_url, obj.get_absolute_url())
+        label = label_for_object(
+            config, obj, qrcode_data(config, obj, url), with_text, text_below
+        )
+        names.append(label_name(obj))
+        yield config, label, text_below
+
+
+def render_labels(  # pylint:disable=too-many-arguments
+    config, objects, base_url, with_text, text_below, png=True, workers=1
+):
+    """Render the QR Codes of all objects, yields (name, result).
+
+    workers is the number of worker processes, 1 renders in this process.
+    """
+    names = deque()
+    results = render_many(
+        label_jobs(config, objects, base_url, with_text, text_below, names),
+        workers=workers,
+        chunksize=config.get("render_chunksize"),
+        fonts=(config.get("font"),),
+        png=png,
+    )
+    for result in results:
+        yield names.popleft(), result
+
+
+def cached_images(  # pylint:disable=too-many-arguments
+    config, objects, base_url, with_text, text_below, image_format="png"
+):
+    """Return the QR Codes of the objects, yields (obj, image) in order.
+
+    QR Codes are taken from the cache or the render store, the missing ones
+    are rendered in this process and kept.
+    """
+    pending = deque()
+
+    def jobs():
+        for image, content, label, key in lookup_images(
+            config, objects, base_url, with_text, text_below, image_format
+        ):
+            pending.append((image, key, content))
+            if content is None:
+                yield config, label, text_below
+
+    if image_format == "svg":
+        results = (render_label_svg(*job) for job in jobs())
+    else:
+        results = render_many(
+            jobs(),
+            workers=1,
+            chunksize=config.get("render_chunksize"),
+            fonts=(config.get("font"),),
+            profile=config.get("png_profile"),
+        )
+    for rendered in results:
+        # Cached images queued before the rendered one are passed on first.
+        image, key, content = pending.popleft()
+        while content is not None:
+            yield image.obj, content
+            image, key, content = pending.popleft()
+        keep_image(image, key, rendered)
+        yield image.obj, rendered
+    for image, _, content in pending:
+        yield image.obj, content
+
+
+def iter_zip(labels, model, extension="png"):
+    """Generate a ZIP file of images, one QR Code after another."""
+    stream = StreamWriter()
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_STORED) as archive:
+        for name, image in labels:
+            archive.writestr("{}-{}.{}".format(model, name, extension), image)
+            yield stream.pop()
+    yield stream.pop()
+
+
+def iter_pdf(labels, sheet):
+    """Generate a PDF of label sheets, one page after another."""
+    writer = PDFWriter()
+    yield writer.start()
+    page = []
+    for _, png in labels:
+        page.append(png)
+        if len(page) == sheet.labels_per_page:
+            yield writer.page(sheet, page)
+            page = []
+    if page:
+        yield writer.page(sheet, page)
+    yield writer.finish()
+
+
+def export_labels(  # pylint:disable=too-many-arguments
+    config,
+    objects,
+    base_url,
+    model,
+    with_text=False,
+    text_below=False,
+    output_format="pdf",
+    progress=None,
+    workers=1,
+):
+    """Generate the label file of the objects in the given format.
+
+    progress is called with the number of rendered labels after each label.
+    Requests render in their own process, background jobs pass the
+    render_workers setting as workers.
+    """
+    labels = render_labels(
+        config, objects, base_url, with_text, text_below, workers=workers
+    )
+    if progress is not None:
+        labels = _report_progress(labels, progress)
+    if output_format == "zip":
+        return iter_zip(labels, model)
+    return iter_pdf(labels, label_sheet(config))
+
+
+def _report_progress(labels, progress):
+    """Call progress with the number of labels passed on so far."""
+    for rendered, label in enumerate(labels, 1):
+        yield label
+        progress(rendered)
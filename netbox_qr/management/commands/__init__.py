@@ -0,0 +1 @@
+"""Management commands of the netbox_qr plugin."""
@@ -0,0 +1,152 @@
+"""Pre-render the QR Codes of all objects into the cache and the render store."""
+import hashlib
+from collections import deque
+from urllib.parse import urljoin
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from ...cache import CACHE_PREFIX
+from ...netbox_qr import render_label_svg
+from ...pool import render_many
+from ...prefetch import iterate_planned
+from ...render import (
+    image_kept,
+    image_label,
+    keep_image,
+    model_config,
+    object_image,
+    qrcode_data,
+)
+from ...store import render_store
+from ...template_content import get_supported_model, template_extensions
+
+# The (with_text, text_below) variants offered by the QR Code panel.
+VARIANTS = ((False, False), (True, False), (True, True))
+
+
+class Command(BaseCommand):
+    """Pre-render the QR Codes of all objects into the cache and the render store."""
+
+    help = (
+        "Render the QR Codes of all objects of the supported models into the "
+        "cache and the render store. An interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        """Add the options of the command."""
+        parser.add_argument(
+            "--base-url",
+            required=True,
+            help="URL NetBox is reached at, e.g. https://netbox.example.com/",
+        )
+        parser.add_argument(
+            "--changed-since",
+            help="Only render objects updated after this date and time (ISO 8601).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Worker processes, by default the render_workers setting.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Objects rendered between two checkpoints.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint of an interrupted run.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Render QR Codes, which are already kept, again.",
+        )
+
+    def handle(self, *args, **options):
+        """Render the QR Codes of all models."""
+        changed_since = None
+        if options["changed_since"]:
+            changed_since = parse_datetime(options["changed_since"])
+            if changed_since is None:
+                raise CommandError("--changed-since is not a valid date and time.")
+            if timezone.is_naive(changed_since):
+                changed_since = timezone.make_aware(changed_since)
+
+        # The checkpoint lives next to the rendered QR Codes, so flushing the
+        # cache also restarts the warm up.
+        run = "{} {}".format(options["base_url"], options["changed_since"])
+        checkpoint_key = "{}:warmup:{}".format(
+            CACHE_PREFIX, hashlib.sha256(run.encode("utf-8")).hexdigest()
+        )
+        checkpoint = {} if options["restart"] else cache.get(checkpoint_key, {})
+
+        for extension in template_extensions:
+            model = extension.model.replace("dcim.", "")
+            config = model_config(model)
+            if config is None or not (
+                config.get("cache_timeout") or render_store(config)
+            ):
+                continue
+            queryset = get_supported_model(model).objects.order_by("pk")
+            if changed_since is not None:
+                queryset = queryset.filter(last_updated__gte=changed_since)
+            if model in checkpoint:
+                queryset = queryset.filter(pk__gt=checkpoint[model])
+            rendered = 0
+            for pk, rendered in self.warm_up(model, config, queryset, options):
+                checkpoint[model] = pk
+                cache.set(checkpoint_key, checkpoint, None)
+            self.stdout.write("{}: {} QR Codes rendered.".format(model, rendered))
+        cache.delete(checkpoint_key)
+
+    def warm_up(self, model, config, queryset, options):
+        """Render the QR Codes of the queryset, yields (pk, rendered) per batch.
+
+        All objects up to pk are kept, when it is yielded. With a render
+        store, QR Codes missing in the store are rendered, even if cached.
+        """
+        image_format = config.get("image_format")
+        pending = deque()
+
+        def jobs():
+            for obj in iterate_planned(queryset, config):
+                url = urljoin(options["base_url"], obj.get_absolute_url())
+                data = qrcode_data(config, obj, url)
+                for with_text, text_below in VARIANTS:
+                    image = object_image(
+                        config, obj, data, with_text, text_below, image_format
+                    )
+                    label, key = image_label(image)
+                    if options["force"] or not image_kept(image, key):
+                        pending.append((obj.pk, image, key))
+                        yield config, label, text_below
+
+        if image_format == "svg":
+            results = (render_label_svg(*job) for job in jobs())
+        else:
+            results = render_many(
+                jobs(),
+                workers=options["workers"] or config.get("render_workers"),
+                chunksize=config.get("render_chunksize"),
+                fonts=(config.get("font"),),
+                profile=config.get("png_profile"),
+            )
+
+        rendered = 0
+        last = completed = None
+        for content in results:
+            pk, image, key = pending.popleft()
+            keep_image(image, key, content)
+            rendered += 1
+            if pk != last:
+                # Objects are rendered in order, so the previous one is done.
+                last, completed = pk, last
+            if rendered % options["batch_size"] == 0 and completed is not None:
+                yield completed, rendered
+                self.stdout.write("{}: {} QR Codes rendered.".format(model, rendered))
+        if last is not None:
+            yield last, rendered
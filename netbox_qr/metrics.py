@@ -0,0 +1,66 @@
+"""Prometheus metrics of rendering QR Codes, if prometheus_client is installed."""
+from .netbox_qr import no_timer
+
+try:
+    from prometheus_client import Counter, Histogram
+except ImportError:
+    Counter = Histogram = None
+
+# Labels of all metrics, so slow renders can be traced to a model and layout.
+LABELS = ("model", "with_text", "text_below")
+
+STAGE_SECONDS = None
+CACHE_REQUESTS = None
+MATRIX_SIZE = None
+if Histogram is not None:
+    # Stages: data, label, encode, center_text, text_layout, text_draw, png, svg
+    # and template.
+    STAGE_SECONDS = Histogram(
+        "netbox_qr_stage_seconds",
+        "Seconds spent in each stage of rendering a QR Code.",
+        ("stage",) + LABELS,
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+    )
+    CACHE_REQUESTS = Counter(
+        "netbox_qr_cache_requests",
+        "Lookups of rendered QR Codes in the cache.",
+        ("result",) + LABELS,
+    )
+    MATRIX_SIZE = Histogram(
+        "netbox_qr_matrix_size",
+        "Modules per side of rendered QR Codes by error level.",
+        ("model", "error"),
+        # Versions 1, 2, 3, 5, 7, 10, 15, 20, 25, 30 and 40.
+        buckets=(21, 25, 29, 37, 45, 57, 77, 97, 117, 137, 177),
+    )
+
+
+def _label_values(model, with_text, text_below):
+    """Return the label values of a render."""
+    return (model, str(bool(with_text)).lower(), str(bool(text_below)).lower())
+
+
+def stage_timer(model, with_text, text_below):
+    """Return a function, which returns a context manager timing a stage."""
+    if STAGE_SECONDS is None:
+        return no_timer
+    values = _label_values(model, with_text, text_below)
+
+    def timer(stage):
+        return STAGE_SECONDS.labels(stage, *values).time()
+
+    return timer
+
+
+def count_cache(hit, model, with_text, text_below):
+    """Count a cache hit or miss."""
+    if CACHE_REQUESTS is not None:
+        CACHE_REQUESTS.labels(
+            "hit" if hit else "miss", *_label_values(model, with_text, text_below)
+        ).inc()
+
+
+def observe_matrix(model, matrix):
+    """Record the size and error level of an encoded QR Code."""
+    if MATRIX_SIZE is not None:
+        MATRIX_SIZE.labels(model, matrix.error).observe(matrix.size)
@@ -1,20 +1,122 @@
 """Supporting functions to generate QR Codes for NetBox."""
 import base64
+import hashlib
+import json
+import math
+from collections import namedtuple
+from collections.abc import Mapping
+from contextlib import nullcontext
+from functools import lru_cache
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
-from pkg_resources import resource_stream
+
+# Pillow, segno, numpy and xml.sax (which loads urllib.request) are imported by
+# the functions using them, so workers never rendering a QR Code skip loading them.
+# pylint:disable=import-outside-toplevel
+
+# Maximum number of (font, size) combinations kept loaded per worker.
+FONT_CACHE_SIZE = 128
+# Error correction levels of QR Codes, from lowest to highest.
+ERROR_LEVELS = ("L", "M", "Q", "H")
+# Number of encoded QR Code matrices kept per worker.
+MATRIX_CACHE_SIZE = 4096
+# Biggest font size tried when fitting text next to or below the QR Code.
+MAX_FONT_SIZE = 56
+
+# Pixels per QR Code module. 1 would be too small.
+QR_SCALE = 2
+# Quiet zone around the QR Code in modules.
+QR_BORDER = 1
+# Pixels between the lines of multi line text.
+LINE_SPACING = 4
+# Size of the text in the center of the QR Code.
+CENTER_FONT_SIZE = 20
+# Font weights of the Roboto font files for SVG text.
+SVG_FONT_WEIGHTS = {
+    "Thin": 100,
+    "Light": 300,
+    "Regular": 400,
+    "Medium": 500,
+    "Bold": 700,
+    "Black": 900,
+}
+
+# PNG encoder options, "speed" for pages and "size" for exports.
+PNG_PROFILES = {
+    "speed": {"compress_level": 1, "compress_type": 3},
+    "size": {"compress_level": 9, "optimize": True},
+}
+# zlib strategies which can be configured as png_compress_strategy.
+PNG_STRATEGIES = {"default": 0, "filtered": 1, "huffman_only": 2, "rle": 3, "fixed": 4}
+# Lookup table mapping grayscale values to palette index 0 (black) or 1 (white).
+BLACK_WHITE_INDEX = [0] * 128 + [1] * 128
+
+# Config keys of the field lists, which are compiled into extractors.
+FIELD_LISTS = ("data_fields", "text_fields", "text_below_fields")
+
+# QR Code modules, rows of size bits packed into bytes, dark modules are 1.
+QRMatrix = namedtuple("QRMatrix", ["size", "bits", "version", "error"])
+# Everything taken from an object to render its QR Code. text is None without text.
+QRCodeLabel = namedtuple("QRCodeLabel", ["data", "center_text", "text"])
+# Placement of the text next to or below a QR Code.
+TextLayout = namedtuple(
+    "TextLayout", ["text", "font_size", "origin", "size", "position"]
+)
+
+
+def pil2png(img, config=None, profile="speed"):
+    """Convert Pillow image to PNG bytes.
+
+    With a config the image is reduced to the configured png_mode and
+    compressed with the settings of the given profile.
+    """
+    output = BytesIO()
+    if config is None:
+        img.save(output, "PNG")
+    else:
+        options = png_options(config, profile)
+        if config.get("png_mode") == "P":
+            options["bits"] = 1
+        quantize(img, config.get("png_mode")).save(output, "PNG", **options)
+    return output.getvalue()
+
+
+def png_options(config, profile):
+    """Return the PNG encoder options of a profile with the configured overrides."""
+    options = dict(PNG_PROFILES[profile])
+    if config.get("png_compress_level") is not None:
+        options["compress_level"] = config.get("png_compress_level")
+    if config.get("png_compress_strategy") is not None:
+        options["compress_type"] = PNG_STRATEGIES[config.get("png_compress_strategy")]
+    return options
+
+
+def quantize(img, mode):
+    """Reduce a black and white image to mode "1" or a two color palette."""
+    from PIL import Image
+
+    if mode == "L" or img.mode == mode:
+        return img
+    if img.mode not in ("1", "L"):
+        img = img.convert("L")
+    if mode == "1":
+        return img.convert("1", dither=Image.NONE)
+    # Palette index 0 is black, 1 is white.
+    indices = img.point(BLACK_WHITE_INDEX)
+    img = Image.frombytes("P", img.size, indices.tobytes())
+    img.putpalette([0, 0, 0, 255, 255, 255])
+    return img
 
 
 def pil2pngdatauri(img):
     """Convert Pillow image to data uri."""
-    output = BytesIO()
-    img.save(output, "PNG")
-    data64 = base64.b64encode(output.getvalue())
+    data64 = base64.b64encode(pil2png(img))
     return u"data:image/png;base64," + data64.decode("utf-8")
 
 
 def get_concat_h(im1, im2):
     """Concatenate two images horizontally."""
+    from PIL import Image
+
     dst = Image.new("RGB", (im1.width + im2.width, im1.height))
     dst.paste(im1, (0, 0))
     dst.paste(im2, (im1.width, 0))
@@ -23,6 +125,8 @@ def get_concat_h(im1, im2):
 
 def get_concat_v(im1, im2):
     """Concatenate two images vertically."""
+    from PIL import Image
+
     dst = Image.new("RGB", (im1.width, im1.height + im2.height))
     dst.paste(im1, (0, 0))
     dst.paste(im2, (0, im1.height))
@@ -36,170 +140,606 @@ def split(str, num):
 
 def image_ensure_text_in_image(img, config, obj, text_below=False):
     """Generate a new empty image."""
+    # Generate the text variable.
     if text_below:
-        # Generate the text variable.
         text = generate_data_from_fields(config, obj, "text_below_fields", None, 8000)
+    else:
+        text = generate_data_from_fields(config, obj, "text_fields", None, 8000)
+    return image_add_text(img, config, text, text_below)
+
+
+def image_add_text(img, config, text, text_below=False):
+    """Put the text below or next to the QR Code."""
+    from PIL import Image
+
+    layout = text_layout(config, text, text_below, img.width, img.height)
+    # Generate empty Image and draw the text to it.
+    img_text = Image.new("L", layout.size, "white")
+    glyph_atlas(config.get("font"), layout.font_size).draw(
+        img_text, layout.position, layout.text
+    )
+    # Now put the two images together.
+    if text_below:
+        return get_concat_v(img, img_text)
+    return get_concat_h(img, img_text)
+
+
+def text_layout(config, text, text_below, width, height):
+    """Fit the text below or next to a QR Code of the given size.
+
+    Returns the text as drawn, the font size, the origin and size of the
+    text area and the position of the text within the area.
+    """
+    if text_below:
         # split text to lines every 15 characters
         text_splitted = split(text, 15)
         text = "\r\n".join(text_splitted)
-        lines = len(text_splitted)
-        # Generate empty Image
-        img_text = Image.new("L", (img.width, lines * 16), "white")
-
-        # Now try the biggest possible font size.
-        font_size = 56
-        flag = True
-        while flag:
-            font = get_font(config, font_size)
-            draw = ImageDraw.Draw(img_text)
-            text_width, text_height = draw.textsize(text, font=font)
-            if text_width < img.width and text_height < lines * 16:
-                flag = False
-            font_size -= 1
-        # Now draw the text to img_text.
-        draw.text(
-            (0, 0),
-            text,
-            font=font,
-            fill="black",
-        )
-        # Now put the two images together.
-        img_text_concat = get_concat_v(img, img_text)
-    else:
-        img_text = Image.new("L", (img.width * 2, img.height), "white")
-        # Generate the text variable.
-        text = generate_data_from_fields(config, obj, "text_fields", None, 8000)
-        # Now try the biggest possible font size.
-        font_size = 56
-        flag = True
-        while flag:
-            font = get_font(config, font_size)
-            draw = ImageDraw.Draw(img_text)
-            text_width, text_height = draw.textsize(text, font=font)
-            if text_width < img.width * 2 and text_height < img.height:
-                flag = False
-            font_size -= 1
-        # Now draw the text to img_text.
-        draw.text(
-            ((img.width * 2 - text_width) / 2, (img.height - text_height) / 2),
-            text,
-            font=font,
-            fill="black",
-        )
-        # Now put the two images together.
-        img_text_concat = get_concat_h(img, img_text)
-    return img_text_concat
+        size = (width, len(text_splitted) * 16)
+        # Now find the biggest possible font size.
+        font_size, _ = fit_font_size(config.get("font"), text, *size)
+        return TextLayout(text, font_size, (0, height), size, (0, 0))
+    size = (width * 2, height)
+    # Now find the biggest possible font size.
+    font_size, (text_width, text_height) = fit_font_size(
+        config.get("font"), text, *size
+    )
+    position = ((size[0] - text_width) / 2, (size[1] - text_height) / 2)
+    return TextLayout(text, font_size, (width, 0), size, position)
 
 
-def get_font(config, size=32):
-    """Try to load the given font or load a "better than nothing" default font."""
-    file_path = resource_stream(__name__, "fonts/" + config.get("font") + ".ttf")
+@lru_cache(maxsize=1)
+def _font_path():
+    """Return the directory of the packaged fonts."""
     try:
-        return ImageFont.truetype(file_path, size)
+        from importlib.resources import files
+    except ImportError:
+        # Python before 3.9, the package is always installed as plain files.
+        from pathlib import Path
+
+        return Path(__file__).resolve().parent / "fonts"
+    return files(__package__) / "fonts"
+
+
+@lru_cache(maxsize=16)
+def _font_bytes(font_name):
+    """Read the raw font file from the package, once per font."""
+    return (_font_path() / (font_name + ".ttf")).read_bytes()
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def _load_font(font_name, size):
+    """Load the given font in the given size, least recently used fonts are evicted."""
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype(BytesIO(_font_bytes(font_name)), size)
     except Exception:
         return ImageFont.load_default()
 
 
+def get_font(config, size=32):
+    """Try to load the given font or load a "better than nothing" default font."""
+    return _load_font(config.get("font"), size)
+
+
+class GlyphAtlas:
+    """Rasterized glyphs and advances of one font size.
+
+    Glyphs are rendered with FreeType the first time they are used, after
+    that measuring text is a sum of advances and drawing it pastes bitmaps.
+    """
+
+    def __init__(self, font):
+        """Take the line metrics from the font, glyphs are added when used."""
+        self.font = font
+        # Pillow puts lines the height of an "A" plus the spacing apart.
+        self.line_height = font.getsize("A")[1] + LINE_SPACING
+        if hasattr(font, "getmetrics"):
+            self.ascent, descent = font.getmetrics()
+        else:
+            self.ascent, descent = self.line_height - LINE_SPACING, 0
+        self.height = self.ascent + descent
+        self.glyphs = {}
+
+    def glyph(self, char):
+        """Return advance, offset and mask of a character."""
+        from PIL import Image, ImageDraw
+
+        try:
+            return self.glyphs[char]
+        except KeyError:
+            pass
+        if hasattr(self.font, "getbbox"):
+            advance = self.font.getlength(char)
+            left, top, right, bottom = self.font.getbbox(char)
+        else:
+            # The default bitmap font has no outlines.
+            right, bottom = self.font.getsize(char)
+            advance, left, top = right, 0, 0
+        mask = None
+        if right > left and bottom > top:
+            mask = Image.new("L", (right - left, bottom - top), 0)
+            ImageDraw.Draw(mask).text((-left, -top), char, font=self.font, fill=255)
+        glyph = self.glyphs[char] = (advance, left, top, mask)
+        return glyph
+
+    @staticmethod
+    def lines(text):
+        """Split text into lines like Pillow, without carriage returns."""
+        return text.replace("\r", "").split("\n")
+
+    def measure(self, text):
+        """Return width and height of the text."""
+        lines = self.lines(text)
+        width = max(sum(self.glyph(char)[0] for char in line) for line in lines)
+        return math.ceil(width), (len(lines) - 1) * self.line_height + self.height
+
+    def draw(self, img, position, text, fill=0):
+        """Draw the text onto the image with its top left corner at position."""
+        left, top = position
+        for line in self.lines(text):
+            x = left
+            for char in line:
+                advance, offset_x, offset_y, mask = self.glyph(char)
+                if mask is not None:
+                    img.paste(fill, (round(x + offset_x), round(top + offset_y)), mask)
+                x += advance
+            top += self.line_height
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def glyph_atlas(font_name, size):
+    """Return the glyph atlas of a font size, shared by all renders of a worker."""
+    return GlyphAtlas(_load_font(font_name, size))
+
+
+def text_size(font_name, size, text):
+    """Measure the given text in the given font and size."""
+    return glyph_atlas(font_name, size).measure(text)
+
+
+@lru_cache(maxsize=1024)
+def fit_font_size(font_name, text, width, height, max_size=MAX_FONT_SIZE):
+    """Find the biggest font size for which the text fits into width x height.
+
+    The text size grows with the font size, so the sizes are bisected
+    instead of being tried one after another. Returns the font size and
+    the measured text size for it.
+    """
+    low, high = 1, max_size
+    fitting = None
+    while low < high:
+        size = (low + high + 1) // 2
+        text_width, text_height = text_size(font_name, size, text)
+        if text_width < width and text_height < height:
+            low = size
+            fitting = (text_width, text_height)
+        else:
+            high = size - 1
+    if fitting is None:
+        fitting = text_size(font_name, low, text)
+    return low, fitting
+
+
+def font_cache_info():
+    """Return the hit/miss counters of the font, glyph atlas and font size caches."""
+    return {
+        "fonts": _load_font.cache_info(),
+        "glyph_atlas": glyph_atlas.cache_info(),
+        "fit_font_size": fit_font_size.cache_info(),
+    }
+
+
+def font_cache_clear():
+    """Drop all loaded fonts, e.g. after the font files changed."""
+    _load_font.cache_clear()
+    _font_bytes.cache_clear()
+    glyph_atlas.cache_clear()
+    fit_font_size.cache_clear()
+
+
 def image_ensure_data_in_image(img, config, obj):
     """Check if data in the center of the QR Code is wanted and generate it."""
+    return image_add_center_text(img, config, get_center_text(config, obj))
+
+
+def get_center_text(config, obj):
+    """Get the text for the center of the QR Code from the object, if wanted."""
     if config.get("data_in_image") and config.get("data_in_image") is not None:
-        if getattr(obj, config.get("data_in_image"), None):
-            # Get a font.
-            file_path = resource_stream(
-                __name__, "fonts/" + config.get("font") + ".ttf"
+        return getattr(obj, config.get("data_in_image"), None) or None
+    return None
+
+
+def image_add_center_text(img, config, text):
+    """Draw the text in the center of the QR Code, if it is small enough."""
+    if text:
+        draw_center_text(img, config, text, img.width, img.height)
+    return img
+
+
+def center_text_box(config, text, width, height):
+    """Return left, top, width and height of the text in the center of a QR Code.
+
+    Returns None if the text is too big to keep the QR Code readable.
+    """
+    text_width, text_height = text_size(config.get("font"), CENTER_FONT_SIZE, text)
+    # Only draw the data in the center of the QR Code if its area
+    # is not more than 28 percent of the whole QR Code.
+    # Should be 30 percent, but this is not working.
+    if text_width * text_height * 100 / (width * height) >= 28:
+        return None
+    return (
+        width / 2 - text_width / 2,
+        height / 2 - text_height / 2,
+        text_width,
+        text_height,
+    )
+
+
+def draw_center_text(img, config, text, width, height):
+    """Draw the text in the center of a QR Code of the given size, if it fits."""
+    from PIL import ImageDraw
+
+    box = center_text_box(config, text, width, height)
+    if box is not None:
+        left, top, text_width, text_height = box
+        ImageDraw.Draw(img).rectangle(
+            [(left, top), (left + text_width, top + text_height)], fill="white"
+        )
+        glyph_atlas(config.get("font"), CENTER_FONT_SIZE).draw(img, (left, top), text)
+
+
+def label_for_object(config, obj, qrcodedata, with_text=False, text_below=False):
+    """Collect the texts of an object, which are needed to render its QR Code."""
+    text = None
+    if with_text:
+        if text_below:
+            text = generate_data_from_fields(
+                config, obj, "text_below_fields", None, 8000
+            )
+        else:
+            text = generate_data_from_fields(config, obj, "text_fields", None, 8000)
+    return QRCodeLabel(qrcodedata, get_center_text(config, obj), text)
+
+
+@lru_cache(maxsize=1)
+def _numpy():
+    """Return numpy if it is installed, otherwise None."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@lru_cache(maxsize=MATRIX_CACHE_SIZE)
+def encode_qr(data, error="H"):
+    """Encode data into a bit packed QR Code matrix, once per data and error level.
+
+    Rendering the same data with another text layout only repeats the
+    compositing, not the version selection, error correction and masking.
+    """
+    import segno
+
+    qr = segno.make(data, error=error)
+    size = len(qr.matrix)
+    row_bytes = (size + 7) // 8
+    bits = bytearray()
+    for row in qr.matrix:
+        value = 0
+        for module in row:
+            value = value << 1 | (module & 1)
+        bits += (value << (row_bytes * 8 - size)).to_bytes(row_bytes, "big")
+    return QRMatrix(size, bytes(bits), qr.version, qr.error)
+
+
+def encode_label(config, label):
+    """Encode the data of a label with the configured error level.
+
+    With error_level "auto" QR Codes with a center text keep level H, as
+    the text covers codewords and function patterns alike. Only if nothing
+    is drawn over the modules the lowest level is used, segno raises it
+    further as long as the version stays the same.
+    """
+    error_level = config.get("error_level", "H")
+    if error_level != "auto":
+        return encode_qr(label.data, error_level)
+    if label.center_text:
+        matrix = encode_qr(label.data, "H")
+        width = (matrix.size + 2 * QR_BORDER) * QR_SCALE
+        if center_text_box(config, label.center_text, width, width) is not None:
+            return matrix
+        # The center text is too big to be drawn, even more so on a smaller code.
+    return encode_qr(label.data, "L")
+
+
+def qr_module_image(matrix, scale=QR_SCALE, border=QR_BORDER):
+    """Build a grayscale image of the QR Code modules from a bit packed matrix."""
+    from PIL import Image
+
+    size = matrix.size + 2 * border
+    numpy = _numpy()
+    if numpy is not None:
+        modules = numpy.frombuffer(matrix.bits, dtype=numpy.uint8)
+        modules = numpy.unpackbits(modules.reshape(matrix.size, -1), axis=1)
+        modules = numpy.pad(modules[:, : matrix.size], border)
+        # Light modules are white, dark modules black.
+        pixels = numpy.array([255, 0], dtype=numpy.uint8)[modules]
+        pixels = pixels.repeat(scale, axis=0).repeat(scale, axis=1)
+        return Image.frombuffer(
+            "L", (size * scale, size * scale), pixels, "raw", "L", 0, 1
+        )
+    # Pillow reads bit packed rows directly, "1;I" maps dark modules to black.
+    modules = Image.frombytes(
+        "1", (matrix.size, matrix.size), matrix.bits, "raw", "1;I"
+    )
+    img = Image.new("L", (size, size), "white")
+    img.paste(modules.convert("L"), (border, border))
+    return img.resize((size * scale, size * scale), Image.NEAREST)
+
+
+def svg_modules(matrix, scale=QR_SCALE, border=QR_BORDER):
+    """Return an SVG path drawing the dark modules, one line per run in a row."""
+    row_bytes = (matrix.size + 7) // 8
+    runs = []
+    for y in range(matrix.size):
+        row = int.from_bytes(matrix.bits[y * row_bytes : (y + 1) * row_bytes], "big")
+        row = bin(row)[2:].zfill(row_bytes * 8)[: matrix.size]
+        x = row.find("1")
+        while x != -1:
+            end = row.find("0", x)
+            end = matrix.size if end == -1 else end
+            runs.append("M{} {}.5h{}".format(x + border, y + border, end - x))
+            x = row.find("1", end) if end < matrix.size else -1
+    return '<path transform="scale({})" stroke="#000" d="{}"/>'.format(
+        scale, "".join(runs)
+    )
+
+
+def no_timer(stage):  # pylint:disable=unused-argument
+    """Time nothing."""
+    return nullcontext()
+
+
+def render_label(config, label, text_below=False, timer=None):
+    """Render the QR Code image of a label.
+
+    The label is drawn into one grayscale image of its final size, instead
+    of concatenating the QR Code and the text. timer(stage) may return a
+    context manager measuring the stages.
+    """
+    from PIL import Image
+
+    timer = timer or no_timer
+    with timer("encode"):
+        modules = qr_module_image(encode_label(config, label))
+        qr_width, qr_height = modules.size
+    width, height = qr_width, qr_height
+    layout = None
+    if label.text is not None:
+        with timer("text_layout"):
+            layout = text_layout(config, label.text, text_below, qr_width, qr_height)
+        width = max(width, layout.origin[0] + layout.size[0])
+        height = max(height, layout.origin[1] + layout.size[1])
+
+    img = Image.new("L", (width, height), "white")
+    img.paste(modules, (0, 0))
+    # Check if we want data in the center of the QRCode.
+    if label.center_text:
+        with timer("center_text"):
+            draw_center_text(img, config, label.center_text, qr_width, qr_height)
+    # Check if we want text below or next to the QRCode.
+    if layout is not None:
+        with timer("text_draw"):
+            glyph_atlas(config.get("font"), layout.font_size).draw(
+                img,
+                (
+                    layout.origin[0] + layout.position[0],
+                    layout.origin[1] + layout.position[1],
+                ),
+                layout.text,
             )
-            font = ImageFont.truetype(file_path, 20)
-            # Get a drawing context.
-            draw = ImageDraw.Draw(img)
-            # Get text from the object.
-            text = getattr(obj, config.get("data_in_image"))
-            # Calculate Text size and area.
-            text_width, text_height = draw.textsize(text, font=font)
-            text_area = text_width * text_height
-            # Calculate Image area.
-            img_area = img.width * img.height
-            if text_area * 100 / img_area < 28:
-                # Only draw the data in the center of the QR Code if its area
-                # is not more than 28 percent of the whole QR Code.
-                # Should be 30 percent, but this is not working.
-                bbox = [
-                    (
-                        img.width / 2 - text_width / 2,
-                        img.height / 2 - text_height / 2,
-                    ),
-                    (
-                        img.width / 2 + text_width / 2,
-                        img.height / 2 + text_height / 2,
-                    ),
-                ]
-                # Box size must not be bigger than 30 percent of the whole image.
-                draw.rectangle(bbox, fill="white")
-                draw.text(
-                    (
-                        img.width / 2 - text_width / 2,
-                        img.height / 2 - text_height / 2,
-                    ),
-                    text,
-                    font=font,
-                )
     return img
 
 
+def _custom_field_text(key):
+    """Return a converter reading a key from a dictionary like custom_field_data."""
+
+    def convert(obj, value):  # pylint:disable=unused-argument
+        try:
+            return value.get(key)
+        except AttributeError:
+            return None
+
+    return convert
+
+
+def _length_text(obj, value):
+    """Add the unit to a length."""
+    return str(value) + " " + getattr(obj, "length_unit")
+
+
+def _termination_text(obj, value):  # pylint:disable=unused-argument
+    """Prefix a cable termination with its device."""
+    try:
+        return str(value.device) + " " + str(value)
+    except AttributeError:
+        return None
+
+
+def _plain_text(obj, value):  # pylint:disable=unused-argument
+    """Use the value as it is."""
+    return value
+
+
+def compile_field(field):
+    """Compile a configured field name into an (attribute, converter) pair."""
+    if "." in field:
+        try:
+            name, key = field.split(".")
+        except ValueError:
+            # Nested keys are not supported, the attribute will never be found.
+            return field, _plain_text
+        return name, _custom_field_text(key)
+    if field == "length":
+        return field, _length_text
+    if field in ("termination_a", "termination_b"):
+        return field, _termination_text
+    return field, _plain_text
+
+
+@lru_cache(maxsize=None)
+def compile_fields(fields):
+    """Compile a tuple of configured field names once."""
+    return tuple(compile_field(field) for field in fields)
+
+
+def extract_fields(compiled, obj, url=None, max_length=4296):
+    """Run compiled fields on an object and join their texts."""
+    data = []
+    count = 0
+    if url is not None:
+        count += len(url)
+    for name, convert in compiled:
+        value = getattr(obj, name, None)
+        if value:
+            text = convert(obj, value)
+            if text:
+                text = "{}".format(text)
+                if count + len(text) < max_length:
+                    data.append(text)
+                    count += len(text)
+        elif name == "url":
+            data.append("{}".format(url))
+    return "\r\n".join(data)
+
+
+def svg_font_attributes(font_name):
+    """Translate a font file name like Roboto-BoldItalic into SVG font attributes."""
+    from xml.sax.saxutils import quoteattr  # nosec
+
+    family, _, style = font_name.partition("-")
+    italic = style.endswith("Italic")
+    if italic:
+        style = style[: -len("Italic")]
+    return 'font-family={} font-weight="{}" font-style="{}"'.format(
+        quoteattr(family + ", sans-serif"),
+        SVG_FONT_WEIGHTS.get(style, 400),
+        "italic" if italic else "normal",
+    )
+
+
+def svg_text(config, text, size, left, top):
+    """Return an SVG text element, one line per tspan like Pillow draws it."""
+    from xml.sax.saxutils import escape  # nosec
+
+    font_name = config.get("font")
+    atlas = glyph_atlas(font_name, size)
+    spans = [
+        '<tspan x="{}" dy="{}">{}</tspan>'.format(
+            left, atlas.line_height if number else atlas.ascent, escape(line)
+        )
+        for number, line in enumerate(atlas.lines(text))
+    ]
+    return '<text y="{}" font-size="{}" {} xml:space="preserve">{}</text>'.format(
+        top, size, svg_font_attributes(font_name), "".join(spans)
+    )
+
+
+def render_label_svg(config, label, text_below=False):
+    """Render the QR Code of a label as SVG, with the texts as text elements."""
+    matrix = encode_label(config, label)
+    qr_width = qr_height = (matrix.size + 2 * QR_BORDER) * QR_SCALE
+    width, height = qr_width, qr_height
+    elements = [svg_modules(matrix)]
+
+    # Check if we want data in the center of the QRCode.
+    if label.center_text:
+        box = center_text_box(config, label.center_text, qr_width, qr_height)
+        if box is not None:
+            left, top, text_width, text_height = box
+            elements.append(
+                '<rect x="{}" y="{}" width="{}" height="{}" fill="white"/>'.format(
+                    left, top, text_width, text_height
+                )
+            )
+            elements.append(
+                svg_text(config, label.center_text, CENTER_FONT_SIZE, left, top)
+            )
+
+    # Check if we want text below or next to the QRCode.
+    if label.text is not None:
+        layout = text_layout(config, label.text, text_below, qr_width, qr_height)
+        width = max(width, layout.origin[0] + layout.size[0])
+        height = max(height, layout.origin[1] + layout.size[1])
+        elements.append(
+            svg_text(
+                config,
+                layout.text,
+                layout.font_size,
+                layout.origin[0] + layout.position[0],
+                layout.origin[1] + layout.position[1],
+            )
+        )
+
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{1}" '
+        'viewBox="0 0 {0} {1}"><rect width="{0}" height="{1}" fill="white"/>'
+        "{2}</svg>".format(width, height, "".join(elements))
+    ).encode("utf-8")
+
+
 def generate_data_from_fields(
     config, obj, fields="data_fields", url=None, __data_max_length__=4296
 ):
     """Generate the QRCode Data from configured data_fields."""
-    data = ""
-    count = 0
-    if url is not None:
-        count += len(url)
-    if config.get(fields):
-        data = []
-        for data_field in config.get(fields, []):
-            cfn = None
-            if "." in data_field:
-                try:
-                    data_field, cfn = data_field.split(".")
-                except ValueError:
-                    cfn = None
-            if getattr(obj, data_field, None):
-                if cfn:
-                    try:
-                        if getattr(obj, data_field).get(cfn):
-                            data_to_append = getattr(obj, data_field).get(cfn)
-                            if count + len(data_to_append) < __data_max_length__:
-                                data.append("{}".format(data_to_append))
-                                count += len(data_to_append)
-                    except AttributeError:
-                        pass
-                else:
-                    if data_field == "length":
-                        data_to_append = (
-                            str(getattr(obj, data_field))
-                            + " "
-                            + getattr(obj, "length_unit")
-                        )
-                        if count + len(data_to_append) < __data_max_length__:
-                            data.append("{}".format(data_to_append))
-                            count += len(data_to_append)
-                    elif data_field in ("termination_a", "termination_b"):
-                        try:
-                            data_to_append = (
-                                str(getattr(obj, data_field).device)
-                                + " "
-                                + str(getattr(obj, data_field))
-                            )
-                            if count + len(data_to_append) < __data_max_length__:
-                                data.append("{}".format(data_to_append))
-                                count += len(data_to_append)
-                        except AttributeError:
-                            pass
-                    else:
-                        data_to_append = getattr(obj, data_field)
-                        if count + len(data_to_append) < __data_max_length__:
-                            data.append("{}".format(data_to_append))
-                            count += len(data_to_append)
-            elif data_field == "url":
-                data.append("{}".format(url))
-        data = "\r\n".join(data)
-    return data
+    compiled = getattr(config, "compiled_fields", {}).get(fields)
+    if compiled is None:
+        compiled = compile_fields(tuple(config.get(fields) or ()))
+    return extract_fields(compiled, obj, url, __data_max_length__)
+
+
+def compact_data(data):
+    """Shorten the data of a QR Code without changing what a reader shows.
+
+    Lines end with a bare newline and lose surrounding whitespace. segno
+    already picks the numeric or alphanumeric mode, where the data allows it.
+    """
+    return "\n".join(line.strip() for line in data.split("\r\n"))
+
+
+class ModelConfig(Mapping):
+    """Read-only plugin config of one model with its field lists compiled."""
+
+    def __init__(self, values):
+        """Freeze the values, compile the field lists and fingerprint the config."""
+        self._values = {
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in values.items()
+        }
+        self.compiled_fields = {
+            fields: compile_fields(tuple(self._values.get(fields) or ()))
+            for fields in FIELD_LISTS
+        }
+        content = json.dumps(self._values, sort_keys=True, default=str)
+        self.fingerprint = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def __getitem__(self, key):
+        """Return a config value."""
+        return self._values[key]
+
+    def __iter__(self):
+        """Iterate over the config keys."""
+        return iter(self._values)
+
+    def __len__(self):
+        """Return the number of config values."""
+        return len(self._values)
+
+    def __reduce__(self):
+        """Pickle the values only, e.g. for worker processes."""
+        return self.__class__, (self._values,)
+
+    def __repr__(self):
+        """Show the config values."""
+        return "{}({!r})".format(self.__class__.__name__, self._values)
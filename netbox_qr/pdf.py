@@ -0,0 +1,230 @@
+"""Stream PNG labels onto PDF label sheets, one page at a time."""
+import struct
+from collections import namedtuple
+
+# Page sizes in millimeters.
+PAGE_SIZES = {
+    "A4": (210, 297),
+    "A5": (148, 210),
+    "Letter": (215.9, 279.4),
+    "Legal": (215.9, 355.6),
+}
+# PDF points per millimeter.
+POINTS_PER_MM = 72 / 25.4
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# PNG color types, which can be embedded into PDF without decoding.
+PNG_GRAY = 0
+PNG_PALETTE = 3
+
+# Image data of a PNG file: the zlib stream of the IDAT chunks and how to read it.
+PDFImage = namedtuple("PDFImage", ["width", "height", "bits", "palette", "data"])
+
+
+def png_image(png):
+    """Read the image data of a gray or palette PNG for embedding into a PDF.
+
+    PDF decodes the zlib stream of PNG files with predictor 15, so the
+    compressed data is copied as it is.
+    """
+    if not png.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG file.")
+    position = len(PNG_SIGNATURE)
+    header = None
+    palette = None
+    data = []
+    while position < len(png):
+        length, kind = struct.unpack(">I4s", png[position : position + 8])
+        chunk = png[position + 8 : position + 8 + length]
+        position += length + 12
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"PLTE":
+            palette = chunk
+        elif kind == b"IDAT":
+            data.append(chunk)
+        elif kind == b"IEND":
+            break
+    width, height, bits, color_type, _, _, interlace = header
+    if color_type not in (PNG_GRAY, PNG_PALETTE) or interlace:
+        raise ValueError("Only non-interlaced gray and palette PNGs are supported.")
+    return PDFImage(
+        width, height, bits, palette if color_type == PNG_PALETTE else None, data
+    )
+
+
+class LabelSheet:
+    """Grid of equally sized labels on a page, all lengths in PDF points."""
+
+    def __init__(  # pylint:disable=too-many-arguments
+        self, page_size, columns, rows, margins=(0, 0, 0, 0), spacing=(0, 0)
+    ):
+        """Lay out the grid, page size, margins and spacing are in millimeters.
+
+        Margins are top, right, bottom and left, spacing is between columns
+        and between rows.
+        """
+        if isinstance(page_size, str):
+            page_size = PAGE_SIZES[page_size]
+        self.width, self.height = (length * POINTS_PER_MM for length in page_size)
+        self.columns = columns
+        self.rows = rows
+        self.top, self.right, self.bottom, self.left = (
+            margin * POINTS_PER_MM for margin in margins
+        )
+        self.spacing_x, self.spacing_y = (space * POINTS_PER_MM for space in spacing)
+        self.label_width = (
+            self.width - self.left - self.right - (columns - 1) * self.spacing_x
+        ) / columns
+        self.label_height = (
+            self.height - self.top - self.bottom - (rows - 1) * self.spacing_y
+        ) / rows
+
+    @property
+    def labels_per_page(self):
+        """Return the number of labels on one page."""
+        return self.columns * self.rows
+
+    def cell(self, index):
+        """Return x, y of the lower left corner of a label, counted row by row."""
+        row, column = divmod(index, self.columns)
+        x = self.left + column * (self.label_width + self.spacing_x)
+        y = self.height - self.top - (row + 1) * self.label_height
+        return x, y - row * self.spacing_y
+
+    def place(self, index, width, height):
+        """Return x, y, width, height of an image scaled into a label and centered."""
+        x, y = self.cell(index)
+        scale = min(self.label_width / width, self.label_height / height)
+        width, height = width * scale, height * scale
+        return (
+            x + (self.label_width - width) / 2,
+            y + (self.label_height - height) / 2,
+            width,
+            height,
+        )
+
+
+def label_sheet(config):
+    """Return the label sheet described by the sheet_* settings of a config."""
+    return LabelSheet(
+        config.get("sheet_page_size"),
+        config.get("sheet_columns"),
+        config.get("sheet_rows"),
+        config.get("sheet_margins"),
+        config.get("sheet_spacing"),
+    )
+
+
+class PDFWriter:
+    """Write a PDF object by object, only the object offsets are kept.
+
+    start() returns the header, page() one page and finish() the page tree
+    and cross-reference table. The returned bytes are written in order.
+    """
+
+    CATALOG = 1
+    PAGES = 2
+
+    def __init__(self):
+        """Reserve the numbers of the catalog and the page tree."""
+        self.offsets = [0, None, None]
+        self.pages = []
+        self.position = 0
+
+    def _reserve(self):
+        """Return the number of a new object."""
+        self.offsets.append(None)
+        return len(self.offsets) - 1
+
+    def _object(self, number, dictionary, stream=None):
+        """Serialize an object and record its offset."""
+        if stream is not None:
+            dictionary = dictionary[:-2] + b" /Length %d >>" % len(stream)
+        data = b"%d 0 obj\n%s\n" % (number, dictionary)
+        if stream is not None:
+            data += b"stream\n%s\nendstream\n" % stream
+        data += b"endobj\n"
+        self.offsets[number] = self.position
+        self.position += len(data)
+        return data
+
+    def start(self):
+        """Return the header and the catalog."""
+        header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self.position = len(header)
+        return header + self._object(
+            self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES
+        )
+
+    def _image(self, image):
+        """Return the number and the serialized image XObject of a PNG image."""
+        number = self._reserve()
+        if image.palette is not None:
+            color_space = b"[/Indexed /DeviceRGB %d <%s>]" % (
+                len(image.palette) // 3 - 1,
+                image.palette.hex().encode("ascii"),
+            )
+        else:
+            color_space = b"/DeviceGray"
+        dictionary = (
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+            b"/ColorSpace %s /BitsPerComponent %d /Filter /FlateDecode "
+            b"/DecodeParms << /Predictor 15 /Colors 1 /BitsPerComponent %d "
+            b"/Columns %d >> >>"
+            % (
+                image.width,
+                image.height,
+                color_space,
+                image.bits,
+                image.bits,
+                image.width,
+            )
+        )
+        return number, self._object(number, dictionary, b"".join(image.data))
+
+    def page(self, sheet, pngs):
+        """Return a page with the PNG files placed on the label sheet."""
+        output = []
+        images = []
+        commands = []
+        for index, png in enumerate(pngs):
+            image = png_image(png)
+            number, data = self._image(image)
+            output.append(data)
+            images.append(b"/Im%d %d 0 R" % (index, number))
+            x, y, width, height = sheet.place(index, image.width, image.height)
+            commands.append(
+                b"q %.2f 0 0 %.2f %.2f %.2f cm /Im%d Do Q"
+                % (width, height, x, y, index)
+            )
+        content = self._reserve()
+        output.append(self._object(content, b"<< >>", b"\n".join(commands)))
+        page = self._reserve()
+        output.append(
+            self._object(
+                page,
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+                b"/Resources << /XObject << %s >> >> /Contents %d 0 R >>"
+                % (self.PAGES, sheet.width, sheet.height, b" ".join(images), content),
+            )
+        )
+        self.pages.append(page)
+        return b"".join(output)
+
+    def finish(self):
+        """Return the page tree, the cross-reference table and the trailer."""
+        output = self._object(
+            self.PAGES,
+            b"<< /Type /Pages /Kids [%s] /Count %d >>"
+            % (b" ".join(b"%d 0 R" % page for page in self.pages), len(self.pages)),
+        )
+        xref = self.position
+        output += b"xref\n0 %d\n0000000000 65535 f \n" % len(self.offsets)
+        output += b"".join(b"%010d 00000 n \n" % offset for offset in self.offsets[1:])
+        output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            len(self.offsets),
+            self.CATALOG,
+            xref,
+        )
+        return output
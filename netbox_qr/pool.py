@@ -0,0 +1,77 @@
+"""Render many QR Codes in parallel worker processes."""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from .netbox_qr import (
+    CENTER_FONT_SIZE,
+    _font_bytes,
+    glyph_atlas,
+    pil2png,
+    render_label,
+)
+
+
+def _warm_up(fonts):
+    """Load the fonts once when a worker process starts."""
+    for font in fonts:
+        _font_bytes(font)
+        glyph_atlas(font, CENTER_FONT_SIZE)
+
+
+def render_job(job, png=True, profile=None):
+    """Render a (config, label, text_below) job to PNG bytes or a Pillow image.
+
+    PNGs are compressed with the given profile, by default the export profile.
+    """
+    config, label, text_below = job
+    img = render_label(config, label, text_below)
+    if png:
+        return pil2png(img, config, profile or config.get("export_png_profile"))
+    return img
+
+
+def _render_chunk(jobs, png, profile):
+    """Render a list of jobs in a worker process."""
+    return [render_job(job, png, profile) for job in jobs]
+
+
+def _chunks(iterable, size):
+    """Split an iterable into lists of the given size."""
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def render_many(  # pylint:disable=too-many-arguments
+    jobs, workers=None, chunksize=16, fonts=("Roboto-Regular",), png=True, profile=None
+):
+    """Render (config, label, text_below) jobs and yield the results in order.
+
+    Jobs are read lazily and at most two chunks per worker are in flight,
+    so memory stays bounded for any number of jobs. Use workers=1 to render
+    in the calling process, which is also done if all jobs fit in one chunk.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for job in jobs:
+            yield render_job(job, png, profile)
+        return
+    chunks = _chunks(jobs, chunksize)
+    head = list(islice(chunks, 2))
+    if len(head) < 2:
+        for chunk in head:
+            yield from _render_chunk(chunk, png, profile)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_warm_up, initargs=(tuple(fonts),)
+    ) as executor:
+        pending = deque()
+        for chunk in chain(head, chunks):
+            pending.append(executor.submit(_render_chunk, chunk, png, profile))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,84 @@
+"""Plan the related objects to load when rendering the QR Codes of many objects."""
+from collections import defaultdict, namedtuple
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import prefetch_related_objects
+from .netbox_qr import FIELD_LISTS
+
+# Generic relations which are rendered together with the device of their target.
+DEVICE_FIELDS = ("termination_a", "termination_b")
+# Related objects read by str() of unnamed objects, which names the label files.
+NAME_RELATED = {"device": ("device_type__manufacturer", "virtual_chassis")}
+# Number of objects loaded with one set of queries.
+PREFETCH_BATCH_SIZE = 500
+
+QueryPlan = namedtuple(
+    "QueryPlan", ["select_related", "prefetch_related", "device_fields"]
+)
+
+
+def configured_fields(config):
+    """Return the names of all object attributes the config reads."""
+    names = set()
+    for fields in FIELD_LISTS:
+        for field in config.get(fields) or ():
+            names.add(field.split(".")[0])
+    if config.get("data_in_image"):
+        names.add(config.get("data_in_image"))
+    return names
+
+
+def plan_queryset(model_class, config):
+    """Derive the related objects to load together with the objects of a model."""
+    select_related = list(NAME_RELATED.get(model_class._meta.model_name, ()))
+    prefetch_related = []
+    device_fields = []
+    for name in sorted(configured_fields(config)):
+        try:
+            field = model_class._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Properties and the "url" field.
+            continue
+        if isinstance(field, GenericForeignKey):
+            prefetch_related.append(name)
+            if name in DEVICE_FIELDS:
+                device_fields.append(name)
+        elif field.many_to_one or (field.one_to_one and field.concrete):
+            if not any(path.split("__")[0] == name for path in select_related):
+                select_related.append(name)
+    return QueryPlan(
+        tuple(select_related), tuple(prefetch_related), tuple(device_fields)
+    )
+
+
+def prefetch_devices(objects, plan):
+    """Load the devices of generic related objects and what their str() reads.
+
+    Takes a fixed number of queries per model of the related objects.
+    """
+    related_by_model = defaultdict(list)
+    for obj in objects:
+        for name in plan.device_fields:
+            related = getattr(obj, name, None)
+            if related is not None and hasattr(related, "device_id"):
+                related_by_model[type(related)].append(related)
+    lookups = ["device"] + ["device__" + path for path in NAME_RELATED["device"]]
+    for related in related_by_model.values():
+        prefetch_related_objects(related, *lookups)
+
+
+def iterate_planned(queryset, config, batch_size=PREFETCH_BATCH_SIZE):
+    """Iterate over the objects of a queryset with everything the config reads.
+
+    QuerySet.iterator() skips prefetch_related, so the objects are loaded in
+    batches, each with a fixed number of queries.
+    """
+    plan = plan_queryset(queryset.model, config)
+    queryset = queryset.select_related(*plan.select_related).prefetch_related(
+        *plan.prefetch_related
+    )
+    pk_list = list(queryset.values_list("pk", flat=True))
+    for start in range(0, len(pk_list), batch_size):
+        batch = list(queryset.filter(pk__in=pk_list[start : start + batch_size]))
+        prefetch_devices(batch, plan)
+        yield from batch
@@ -0,0 +1,299 @@
+"""Render QR Codes of NetBox objects."""
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import urljoin
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from .cache import get_rendered, render_key, set_rendered
+from .metrics import count_cache, observe_matrix, stage_timer
+from .netbox_qr import (
+    ERROR_LEVELS,
+    FIELD_LISTS,
+    ModelConfig,
+    PNG_PROFILES,
+    PNG_STRATEGIES,
+    _font_bytes,
+    compact_data,
+    encode_label,
+    generate_data_from_fields,
+    label_for_object,
+    pil2png,
+    render_label,
+    render_label_svg,
+)
+from .pdf import PAGE_SIZES, label_sheet
+from .store import render_store, store_key
+
+# Content types of the image formats QR Codes can be rendered in.
+IMAGE_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Everything needed to answer a request for a QR Code image.
+ImageRequest = namedtuple(
+    "ImageRequest",
+    [
+        "config",
+        "obj",
+        "qrcodedata",
+        "cache_key",
+        "with_text",
+        "text_below",
+        "image_format",
+        "etag",
+        "last_modified",
+    ],
+)
+
+# Settings which must be a number of seconds or objects: the minimum and if
+# None is allowed.
+INTEGER_SETTINGS = {
+    "cache_timeout": (0, False),
+    "browser_cache_timeout": (0, False),
+    "render_store_max_size": (0, False),
+    "render_workers": (0, True),
+    "render_threads": (1, False),
+    "render_queue": (1, False),
+    "render_chunksize": (1, False),
+    "background_threshold": (0, False),
+    "export_job_timeout": (0, False),
+    "export_retention": (0, False),
+    "api_max_objects": (0, False),
+}
+
+
+def validate_config(model, config):
+    """Raise ImproperlyConfigured if the config of a model is not usable."""
+    for fields in FIELD_LISTS:
+        value = config.get(fields) or ()
+        if not isinstance(value, tuple) or not all(isinstance(f, str) for f in value):
+            raise ImproperlyConfigured(
+                f"netbox_qr: {model} {fields} must be a list of field names."
+            )
+    if config.get("image_format") not in IMAGE_FORMATS:
+        raise ImproperlyConfigured(
+            f"netbox_qr: {model} image_format must be png or svg."
+        )
+    if config.get("error_level") not in ("auto", *ERROR_LEVELS):
+        raise ImproperlyConfigured(
+            f"netbox_qr: {model} error_level must be auto, L, M, Q or H."
+        )
+    if config.get("png_mode") not in ("1", "P", "L"):
+        raise ImproperlyConfigured(f"netbox_qr: {model} png_mode must be 1, P or L.")
+    for setting in ("png_profile", "export_png_profile"):
+        if config.get(setting) not in PNG_PROFILES:
+            raise ImproperlyConfigured(
+                f"netbox_qr: {model} {setting} must be speed or size."
+            )
+    if config.get("png_compress_level") not in (None, *range(10)):
+        raise ImproperlyConfigured(
+            f"netbox_qr: {model} png_compress_level must be between 0 and 9."
+        )
+    if config.get("png_compress_strategy") not in (None, *PNG_STRATEGIES):
+        raise ImproperlyConfigured(
+            f"netbox_qr: {model} png_compress_strategy must be one of "
+            f"{', '.join(PNG_STRATEGIES)}."
+        )
+    if config.get("data_in_image") is not None and not isinstance(
+        config.get("data_in_image"), str
+    ):
+        raise ImproperlyConfigured(f"netbox_qr: {model} data_in_image must be a field.")
+    if config.get("render_store") is not None and not isinstance(
+        config.get("render_store"), str
+    ):
+        raise ImproperlyConfigured(
+            f"netbox_qr: {model} render_store must be a directory path."
+        )
+    for setting, (minimum, nullable) in INTEGER_SETTINGS.items():
+        value = config.get(setting)
+        if value is None and nullable:
+            continue
+        if not isinstance(value, int) or value < minimum:
+            raise ImproperlyConfigured(
+                f"netbox_qr: {model} {setting} must be a number of at least {minimum}."
+            )
+    validate_sheet(model, config)
+    try:
+        _font_bytes(config.get("font"))
+    except Exception as error:
+        raise ImproperlyConfigured(
+            f"netbox_qr: {model} font {config.get('font')} not found."
+        ) from error
+
+
+def _lengths(value, count):
+    """Check if value is a list of count lengths in millimeters."""
+    return (
+        isinstance(value, tuple)
+        and len(value) == count
+        and all(isinstance(length, (int, float)) and length >= 0 for length in value)
+    )
+
+
+def validate_sheet(model, config):
+    """Raise ImproperlyConfigured if the label sheet of a model is not usable."""
+    page_size = config.get("sheet_page_size")
+    if page_size not in PAGE_SIZES and not _lengths(page_size, 2):
+        raise ImproperlyConfigured(
+            f"netbox_qr: {model} sheet_page_size must be one of "
+            f"{', '.join(PAGE_SIZES)} or [width, height] in millimeters."
+        )
+    for setting in ("sheet_columns", "sheet_rows"):
+        if not isinstance(config.get(setting), int) or config.get(setting) < 1:
+            raise ImproperlyConfigured(
+                f"netbox_qr: {model} {setting} must be at least 1."
+            )
+    if not _lengths(config.get("sheet_margins"), 4):
+        raise ImproperlyConfigured(
+            f"netbox_qr: {model} sheet_margins must be [top, right, bottom, left] "
+            "in millimeters."
+        )
+    if not _lengths(config.get("sheet_spacing"), 2):
+        raise ImproperlyConfigured(
+            f"netbox_qr: {model} sheet_spacing must be [horizontal, vertical] "
+            "in millimeters."
+        )
+    sheet = label_sheet(config)
+    if sheet.label_width <= 0 or sheet.label_height <= 0:
+        raise ImproperlyConfigured(
+            f"netbox_qr: {model} labels do not fit on the sheet_page_size."
+        )
+
+
+@lru_cache(maxsize=1)
+def model_configs():
+    """Resolve and validate the config of every configured model once.
+
+    Model sections like "cable" override the plugin wide settings.
+    """
+    # pylint:disable=import-outside-toplevel,cyclic-import
+    from .template_content import template_extensions
+
+    config = settings.PLUGINS_CONFIG.get("netbox_qr", {})
+    models = [extension.model.replace("dcim.", "") for extension in template_extensions]
+    defaults = {key: value for key, value in config.items() if key not in models}
+    configs = {}
+    for model in models:
+        if config.get(model) is not None:
+            configs[model] = ModelConfig({**defaults, **config[model]})
+            validate_config(model, configs[model])
+    return configs
+
+
+def model_config(model):
+    """Return the resolved config of a model.
+
+    Returns None if QR Codes are not configured for the model.
+    """
+    return model_configs().get(model)
+
+
+def render_image(  # pylint:disable=too-many-arguments
+    config, label, model, with_text=False, text_below=False, image_format="png"
+):
+    """Render a label as PNG or SVG file, without touching the database."""
+    timer = stage_timer(model, with_text, text_below)
+    if image_format == "svg":
+        with timer("svg"):
+            image = render_label_svg(config, label, text_below)
+    else:
+        img = render_label(config, label, text_below, timer)
+        with timer("png"):
+            image = pil2png(img, config, config.get("png_profile"))
+    observe_matrix(model, encode_label(config, label))
+    return image
+
+
+def object_image(  # pylint:disable=too-many-arguments
+    config, obj, qrcodedata, with_text, text_below, image_format
+):
+    """Return the image request of an object, without browser cache headers."""
+    return ImageRequest(
+        config,
+        obj,
+        qrcodedata,
+        render_key(obj, qrcodedata, config, with_text, text_below, image_format),
+        with_text,
+        text_below,
+        image_format,
+        None,
+        None,
+    )
+
+
+def image_label(image):
+    """Return the label of an image and its render store key, None without a store."""
+    label = label_for_object(
+        image.config, image.obj, image.qrcodedata, image.with_text, image.text_below
+    )
+    key = None
+    if render_store(image.config) is not None:
+        key = store_key(image.config, label, image.text_below, image.image_format)
+    return label, key
+
+
+def lookup_image(image):
+    """Look up a rendered image in the Django cache and the render store.
+
+    Returns the image as bytes or open file, or None with the label and the
+    store key needed to render and keep it.
+    """
+    config = image.config
+    model = image.obj._meta.model_name
+    store = render_store(config)
+    # Without a render store the Django cache is used even with cache_timeout 0.
+    if store is None or config.get("cache_timeout"):
+        content = get_rendered(image.cache_key)
+        if content is not None:
+            count_cache(True, model, image.with_text, image.text_below)
+            return content, None, None
+    with stage_timer(model, image.with_text, image.text_below)("label"):
+        label, key = image_label(image)
+    if store is not None:
+        file = store.open(key, image.image_format)
+        if file is not None:
+            count_cache(True, model, image.with_text, image.text_below)
+            return file, None, None
+    count_cache(False, model, image.with_text, image.text_below)
+    return None, label, key
+
+
+def lookup_images(  # pylint:disable=too-many-arguments
+    config, objects, base_url, with_text, text_below, image_format="png"
+):
+    """Look up the rendered images of many objects like lookup_image.
+
+    Yields (image request, content, label, store key), files of the render
+    store are read, as the images are sent together.
+    """
+    for obj in objects:
+        data = qrcode_data(config, obj, urljoin(base_url, obj.get_absolute_url()))
+        image = object_image(config, obj, data, with_text, text_below, image_format)
+        content, label, key = lookup_image(image)
+        if content is not None and not isinstance(content, bytes):
+            with content:
+                content = content.read()
+        yield image, content, label, key
+
+
+def image_kept(image, key):
+    """Check if an image is kept, in the render store if there is one."""
+    store = render_store(image.config)
+    if store is not None:
+        return store.contains(key, image.image_format)
+    return get_rendered(image.cache_key) is not None
+
+
+def keep_image(image, key, content):
+    """Keep a rendered image in the render store and the Django cache."""
+    store = render_store(image.config)
+    if store is not None:
+        store.put(key, image.image_format, content)
+    if store is None or image.config.get("cache_timeout"):
+        set_rendered(image.cache_key, content, image.config.get("cache_timeout"))
+
+
+def qrcode_data(config, obj, url):
+    """Generate the data which is read by the qr code reader."""
+    data = generate_data_from_fields(config, obj, "data_fields", url)
+    if config.get("compact_data"):
+        data = compact_data(data)
+    return data
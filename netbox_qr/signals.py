@@ -0,0 +1,16 @@
+"""Signal handlers to invalidate cached QR Codes."""
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+from .cache import invalidate_object
+from .template_content import template_extensions
+
+
+def invalidate_cached_qr(sender, instance, **kwargs):
+    """Drop the cached QR Codes of a changed or deleted object."""
+    invalidate_object(sender._meta.label_lower, instance.pk)
+
+
+for extension in template_extensions:
+    model = apps.get_model(extension.model)
+    post_save.connect(invalidate_cached_qr, sender=model)
+    post_delete.connect(invalidate_cached_qr, sender=model)
@@ -0,0 +1,165 @@
+"""Content addressed files of rendered QR Codes, a cache tier outside of Redis."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import suppress
+from functools import lru_cache
+
+# Files are only touched again after this many seconds, to save writes.
+TOUCH_INTERVAL = 3600
+# Garbage collection deletes files until the store is this full.
+LOW_WATERMARK = 0.9
+# Suffix of files being written, they are not part of the store yet.
+TEMPORARY = ".tmp"
+# Seconds after which unfinished files were left behind by a killed process.
+ABANDONED_AFTER = TOUCH_INTERVAL
+
+
+def store_key(config, label, text_below, image_format):
+    """Return the address of a rendered label: a hash of what it is rendered from."""
+    content = json.dumps(
+        [
+            label.data,
+            label.center_text,
+            label.text,
+            text_below,
+            image_format,
+            config.fingerprint,
+        ]
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class RenderStore:
+    """Rendered QR Codes as files below a directory, at most max_size bytes.
+
+    Files are named by their store key and sharded into two directory
+    levels. The least recently used files are deleted when the store is
+    full, the modification time marks the last use. Measuring the store and
+    deleting files runs in a background thread, not in the request.
+    """
+
+    def __init__(self, root, max_size):
+        """Use the given directory, it is created when needed."""
+        self.root = root
+        self.max_size = max_size
+        # Bytes used at the last collection plus the bytes written since.
+        self.size = None
+        self.lock = threading.Lock()
+        self.collector = None
+
+    def path(self, key, extension):
+        """Return the path of the file of a key."""
+        return os.path.join(self.root, key[:2], key[2:4], key + "." + extension)
+
+    def contains(self, key, extension):
+        """Check if the file of a key is stored."""
+        return os.path.exists(self.path(key, extension))
+
+    def open(self, key, extension):
+        """Open the file of a key for reading and mark it as used, None if missing."""
+        path = self.path(key, extension)
+        try:
+            file = open(path, "rb")  # pylint:disable=consider-using-with
+        except FileNotFoundError:
+            return None
+        try:
+            if time.time() - os.fstat(file.fileno()).st_mtime > TOUCH_INTERVAL:
+                os.utime(path)
+        except OSError:
+            # Deleted by the garbage collection meanwhile, the open file still works.
+            pass
+        return file
+
+    def put(self, key, extension, content):
+        """Store a rendered QR Code, atomically replacing an existing file."""
+        path = self.path(key, extension)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=TEMPORARY)
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(content)
+            os.replace(temporary, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(temporary)
+            raise
+        with self.lock:
+            if self.size is not None:
+                self.size += len(content)
+            if self.collector is None and (
+                self.size is None or self.size > self.max_size
+            ):
+                self.collector = threading.Thread(
+                    target=self.collect, name="netbox_qr-store", daemon=True
+                )
+                self.collector.start()
+
+    def _files(self):
+        """Yield (mtime, size, path) of all files, unfinished ones included."""
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def disk_usage(self):
+        """Return the bytes used by all stored files, without unfinished ones."""
+        return sum(
+            size for _, size, path in self._files() if not path.endswith(TEMPORARY)
+        )
+
+    def collect(self):
+        """Measure the store and if it is full, delete the least recently used files.
+
+        Files are deleted until the store is below LOW_WATERMARK of its limit.
+        Unfinished files are deleted once they are ABANDONED_AFTER seconds old.
+        """
+        try:
+            abandoned = time.time() - ABANDONED_AFTER
+            files = []
+            size = 0
+            for mtime, file_size, path in self._files():
+                if not path.endswith(TEMPORARY):
+                    files.append((mtime, file_size, path))
+                    size += file_size
+                elif mtime < abandoned:
+                    with suppress(FileNotFoundError):
+                        os.unlink(path)
+            if size > self.max_size:
+                files.sort()
+                for _, file_size, path in files:
+                    if size <= self.max_size * LOW_WATERMARK:
+                        break
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        continue
+                    size -= file_size
+            with self.lock:
+                self.size = size
+        finally:
+            with self.lock:
+                self.collector = None
+
+
+@lru_cache(maxsize=None)
+def _render_store(root, max_size):
+    """Return the store of a directory, shared by all models using it."""
+    return RenderStore(root, max_size)
+
+
+def render_store(config):
+    """Return the render store of a config, None if render_store is not set."""
+    if not config.get("render_store"):
+        return None
+    return _render_store(
+        config.get("render_store"), config.get("render_store_max_size")
+    )
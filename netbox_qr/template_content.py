@@ -1,12 +1,10 @@
 """Netbox QR Code template content."""
+from urllib.parse import urlencode
+from django.apps import apps
+from django.urls import reverse
 from extras.plugins import PluginTemplateExtension
-import segno
-from .netbox_qr import (
-    generate_data_from_fields,
-    pil2pngdatauri,
-    image_ensure_text_in_image,
-    image_ensure_data_in_image,
-)
+from .metrics import stage_timer
+from .render import model_config
 
 
 class QRCodeContent(PluginTemplateExtension):
@@ -14,18 +12,14 @@ class QRCodeContent(PluginTemplateExtension):
 
     def x_page(self):
         """Generate Content for page."""
-        config = self.context["config"]
         obj = self.context["object"]
-        url = self.context["request"].build_absolute_uri(obj.get_absolute_url())
+        model = self.model.replace("dcim.", "")
 
-        # Get object specific settings.
-        obj_cfg = config.get(self.model.replace("dcim.", ""))
-        if obj_cfg is None:
+        # Only show QR Codes for models with object specific settings.
+        config = model_config(model)
+        if config is None:
             return ""
 
-        # Override default config.
-        config.update(obj_cfg)
-
         # Check for format in request, to display the right activated button on the web page.
         if (
             "with_text" in self.context["request"].GET
@@ -44,30 +38,40 @@ class QRCodeContent(PluginTemplateExtension):
         else:
             text_below = False
 
-        # Generate the data which is read by the qr code reader.
-        qrcodedata = generate_data_from_fields(config, obj, "data_fields", url)
-
-        # Generate the base QR Code Image. Scale 2 because 1 would be too small.
-        qrcode_image = segno.make(qrcodedata, error="H").to_pil(scale=2, border=1)
-
-        # Check if we want data in the center of the QRCode.
-        qrcode_image = image_ensure_data_in_image(qrcode_image, config, obj)
-
-        # Check if we want text below or next to the QRCode.
-        if with_text:
-            qrcode_image = image_ensure_text_in_image(
-                qrcode_image, config, obj, text_below
+        # The image is served by its own view, so browsers can cache it and the
+        # page does not wait for it to be rendered.
+        qr_image = self.context["request"].build_absolute_uri(
+            reverse(
+                "plugins:netbox_qr:qrcode_image",
+                kwargs={
+                    "model": model,
+                    "pk": obj.pk,
+                    "image_format": config.get("image_format"),
+                },
             )
-        # Render the page content.
-        return self.render(
-            "netbox_qr/qr.html",
-            extra_context={
-                "qr": pil2pngdatauri(qrcode_image),
-                "with_text": with_text,
-                "text_below": text_below,
-            },
+        )
+        qr_url = "{}?{}".format(
+            qr_image,
+            urlencode(
+                {
+                    "with_text": "true" if with_text else "false",
+                    "text_below": "true" if text_below else "false",
+                }
+            ),
         )
 
+        # Render the page content.
+        with stage_timer(model, with_text, text_below)("template"):
+            return self.render(
+                "netbox_qr/qr.html",
+                extra_context={
+                    "qr": qr_url,
+                    "qr_image": qr_image,
+                    "with_text": with_text,
+                    "text_below": text_below,
+                },
+            )
+
 
 class DeviceQRCodeContent(QRCodeContent):
     """Generate QR Code Content for Devices."""
@@ -137,3 +141,11 @@ template_extensions = [
     PowerPanelQRCodeContent,
     PowerFeedQRCodeContent,
 ]
+
+
+def get_supported_model(model):
+    """Return the model class for a model name like "device" or None."""
+    for extension in template_extensions:
+        if extension.model == "dcim." + model:
+            return apps.get_model(extension.model)
+    return None
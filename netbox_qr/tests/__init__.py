@@ -0,0 +1 @@
+"""Tests of the netbox_qr plugin."""
@@ -0,0 +1,150 @@
+"""Tests of reading the configured fields of objects."""
+from types import SimpleNamespace
+from django.test import SimpleTestCase
+from netbox_qr.netbox_qr import (
+    compile_fields,
+    extract_fields,
+    generate_data_from_fields,
+)
+
+
+def legacy_generate_data_from_fields(  # pylint:disable=too-many-branches
+    config, obj, fields="data_fields", url=None, __data_max_length__=4296
+):
+    """Generate the data like before the fields were compiled, as reference."""
+    # pylint:disable=too-many-nested-blocks
+    data = ""
+    count = 0
+    if url is not None:
+        count += len(url)
+    if config.get(fields):
+        data = []
+        for data_field in config.get(fields, []):
+            cfn = None
+            if "." in data_field:
+                try:
+                    data_field, cfn = data_field.split(".")
+                except ValueError:
+                    cfn = None
+            if getattr(obj, data_field, None):
+                if cfn:
+                    try:
+                        if getattr(obj, data_field).get(cfn):
+                            data_to_append = getattr(obj, data_field).get(cfn)
+                            if count + len(data_to_append) < __data_max_length__:
+                                data.append("{}".format(data_to_append))
+                                count += len(data_to_append)
+                    except AttributeError:
+                        pass
+                else:
+                    if data_field == "length":
+                        data_to_append = (
+                            str(getattr(obj, data_field))
+                            + " "
+                            + getattr(obj, "length_unit")
+                        )
+                        if count + len(data_to_append) < __data_max_length__:
+                            data.append("{}".format(data_to_append))
+                            count += len(data_to_append)
+                    elif data_field in ("termination_a", "termination_b"):
+                        try:
+                            data_to_append = (
+                                str(getattr(obj, data_field).device)
+                                + " "
+                                + str(getattr(obj, data_field))
+                            )
+                            if count + len(data_to_append) < __data_max_length__:
+                                data.append("{}".format(data_to_append))
+                                count += len(data_to_append)
+                        except AttributeError:
+                            pass
+                    else:
+                        data_to_append = getattr(obj, data_field)
+                        if count + len(data_to_append) < __data_max_length__:
+                            data.append("{}".format(data_to_append))
+                            count += len(data_to_append)
+            elif data_field == "url":
+                data.append("{}".format(url))
+        data = "\r\n".join(data)
+    return data
+
+
+class Interface:  # pylint:disable=too-few-public-methods
+    """Stand-in for a cable termination."""
+
+    def __init__(self, name, device):
+        """Keep name and device."""
+        self.name = name
+        self.device = device
+
+    def __str__(self):
+        """Return the name like NetBox."""
+        return self.name
+
+
+DEVICE = SimpleNamespace(
+    name="switch-01",
+    serial="FOC1234X0AB",
+    asset_tag="",
+    cf={"inventory": "INV-0042", "empty": ""},
+    custom_field_data={"inventory": "INV-0042"},
+)
+CABLE = SimpleNamespace(
+    label="C-1234",
+    length=12,
+    length_unit="m",
+    termination_a=Interface("Gi1/0/1", "switch-01"),
+    termination_b="circuit termination without device",
+    cf="not a dictionary",
+)
+FIELD_LISTS = (
+    (),
+    ("name", "serial", "url"),
+    ("url", "name"),
+    ("asset_tag", "missing", "name"),
+    ("cf.inventory", "cf.empty", "cf.missing", "custom_field_data.inventory"),
+    ("cf.inventory.nested", "name"),
+    ("label", "length", "termination_a", "termination_b", "url"),
+    ("label", "cf.inventory"),
+)
+URLS = (None, "https://netbox.example.com/dcim/devices/1/")
+
+
+class ExtractFieldsTestCase(SimpleTestCase):
+    """Compiled fields must give the same data as the previous implementation."""
+
+    def test_same_as_legacy(self):
+        """Compare every field list on a device and a cable."""
+        for fields in FIELD_LISTS:
+            config = {"data_fields": list(fields)}
+            for obj in (DEVICE, CABLE):
+                for url in URLS:
+                    with self.subTest(fields=fields, obj=obj, url=url):
+                        self.assertEqual(
+                            generate_data_from_fields(config, obj, "data_fields", url),
+                            legacy_generate_data_from_fields(
+                                config, obj, "data_fields", url
+                            ),
+                        )
+
+    def test_max_length(self):
+        """Fields which would exceed the maximum length are left out."""
+        config = {"data_fields": ["name", "serial", "label"]}
+        for max_length in (0, 5, 10, 20, 21, 30):
+            with self.subTest(max_length=max_length):
+                self.assertEqual(
+                    generate_data_from_fields(
+                        config, DEVICE, "data_fields", "x", max_length
+                    ),
+                    legacy_generate_data_from_fields(
+                        config, DEVICE, "data_fields", "x", max_length
+                    ),
+                )
+
+    def test_compiled_once(self):
+        """Compiling the same fields returns the cached result."""
+        fields = ("name", "cf.inventory", "length")
+        self.assertIs(compile_fields(fields), compile_fields(fields))
+        self.assertEqual(
+            extract_fields(compile_fields(fields), DEVICE), "switch-01\r\nINV-0042"
+        )
@@ -0,0 +1,49 @@
+"""Tests of fitting text into the space next to or below a QR Code."""
+from django.test import SimpleTestCase
+from netbox_qr.netbox_qr import (
+    MAX_FONT_SIZE,
+    fit_font_size,
+    font_cache_clear,
+    font_cache_info,
+    text_size,
+)
+
+FONT = "Roboto-Regular"
+TEXTS = ("switch-01", "switch-01\r\nFOC1234X0AB", "C-1234\r\nGi1/0/1\r\nGi1/0/2", "")
+BOXES = ((290, 145), (145, 32), (580, 290), (30, 10), (2, 2))
+
+
+def linear_font_size(text, width, height):
+    """Try the font sizes one after another from the biggest, like before."""
+    for size in range(MAX_FONT_SIZE, 0, -1):
+        text_width, text_height = text_size(FONT, size, text)
+        if text_width < width and text_height < height:
+            return size
+    return 1
+
+
+class FitFontSizeTestCase(SimpleTestCase):
+    """Bisecting the font size must find the size the linear search found."""
+
+    def test_same_as_linear(self):
+        """Compare the font sizes for several texts and boxes."""
+        for text in TEXTS:
+            for width, height in BOXES:
+                with self.subTest(text=text, width=width, height=height):
+                    size, measured = fit_font_size(FONT, text, width, height)
+                    self.assertEqual(size, linear_font_size(text, width, height))
+                    self.assertEqual(measured, text_size(FONT, size, text))
+
+
+class FontCacheTestCase(SimpleTestCase):
+    """The font caches must be observable."""
+
+    def test_cache_info(self):
+        """All font caches are reported and counted."""
+        font_cache_clear()
+        fit_font_size(FONT, "switch-01", 290, 145)
+        fit_font_size(FONT, "switch-01", 290, 145)
+        info = font_cache_info()
+        self.assertEqual(set(info), {"fonts", "glyph_atlas", "fit_font_size"})
+        self.assertEqual(info["fit_font_size"].hits, 1)
+        self.assertGreater(info["glyph_atlas"].misses, 0)
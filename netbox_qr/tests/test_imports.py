@@ -0,0 +1,103 @@
+"""Tests that importing the plugin stays cheap for workers which never render."""
+import importlib.util
+import json
+import os
+import subprocess  # nosec
+import sys
+import tempfile
+from pathlib import Path
+from django.test import SimpleTestCase
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+# Modules, which must only be imported when a QR Code is rendered.
+HEAVY_MODULES = ("PIL", "segno", "numpy", "pkg_resources")
+# Maximum time in milliseconds to import the modules NetBox loads on startup.
+IMPORT_BUDGET = 50
+# Fresh interpreters importing the modules, the first one also compiles them.
+IMPORT_RUNS = 3
+
+# Just enough of NetBox to import the plugin outside of it.
+NETBOX_STUB = {
+    "extras/__init__.py": "",
+    "extras/plugins.py": (
+        "class PluginConfig:\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "class PluginTemplateExtension:\n"
+        "    pass\n"
+    ),
+}
+
+# Imports the modules in a fresh interpreter, prints time and heavy modules.
+MEASURE_IMPORT = """
+import importlib, json, sys, time
+import django
+from django.conf import settings
+
+settings.configure(PLUGINS_CONFIG={{"netbox_qr": {{}}}})
+django.setup()
+start = time.perf_counter()
+for module in {modules!r}:
+    importlib.import_module(module)
+elapsed = time.perf_counter() - start
+heavy = [module for module in {heavy!r} if module in sys.modules]
+print(json.dumps({{"ms": elapsed * 1000, "heavy": heavy}}))
+"""
+
+
+class ImportTestCase(SimpleTestCase):
+    """Importing the plugin must neither load the render libraries nor take long."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Write the NetBox stub."""
+        super().setUpClass()
+        cls.stub = tempfile.TemporaryDirectory()
+        for name, content in NETBOX_STUB.items():
+            path = Path(cls.stub.name, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Delete the NetBox stub."""
+        cls.stub.cleanup()
+        super().tearDownClass()
+
+    def measure_import(self, modules):
+        """Import the modules in a fresh interpreter and return its measurements."""
+        env = dict(os.environ)
+        env.pop("DJANGO_SETTINGS_MODULE", None)
+        env["PYTHONPATH"] = os.pathsep.join([self.stub.name, str(ROOT)])
+        output = subprocess.run(  # nosec
+            [
+                sys.executable,
+                "-c",
+                MEASURE_IMPORT.format(modules=modules, heavy=HEAVY_MODULES),
+            ],
+            check=True,
+            capture_output=True,
+            cwd=self.stub.name,
+            env=env,
+            text=True,
+        ).stdout
+        return json.loads(output)
+
+    def test_render_modules(self):
+        """The plugin, its template content and the render module."""
+        results = [
+            self.measure_import(
+                ("netbox_qr", "netbox_qr.template_content", "netbox_qr.render")
+            )
+            for _ in range(IMPORT_RUNS)
+        ]
+        self.assertEqual(results[-1]["heavy"], [])
+        self.assertLess(min(result["ms"] for result in results), IMPORT_BUDGET)
+
+    def test_views(self):
+        """The views and the URL routes."""
+        if importlib.util.find_spec("django_rq") is None:
+            self.skipTest("django_rq is not installed")
+        result = self.measure_import(("netbox_qr.views", "netbox_qr.urls"))
+        self.assertEqual(result["heavy"], [])
@@ -0,0 +1,127 @@
+"""Tests of encoding QR Codes into bit packed matrices and drawing their modules."""
+import re
+from unittest import mock
+from django.test import SimpleTestCase
+import segno
+from netbox_qr.netbox_qr import (
+    QRCodeLabel,
+    QR_BORDER,
+    QR_SCALE,
+    _numpy,
+    encode_label,
+    encode_qr,
+    qr_module_image,
+    svg_modules,
+)
+
+DATA = ("https://netbox.example.com/dcim/devices/1/", "switch-01", "x" * 300)
+
+
+class EncodeQRTestCase(SimpleTestCase):
+    """The bit packed matrix must hold the modules segno encodes."""
+
+    def test_bits(self):
+        """Unpack the rows and compare them with the segno matrix."""
+        for data in DATA:
+            with self.subTest(data=data):
+                qr = segno.make(data, error="H")
+                matrix = encode_qr(data, "H")
+                row_bytes = (matrix.size + 7) // 8
+                self.assertEqual(matrix.size, len(qr.matrix))
+                self.assertEqual(len(matrix.bits), matrix.size * row_bytes)
+                self.assertEqual((matrix.version, matrix.error), (qr.version, qr.error))
+                for y, row in enumerate(qr.matrix):
+                    packed = matrix.bits[y * row_bytes : (y + 1) * row_bytes]
+                    bits = bin(int.from_bytes(packed, "big"))[2:].zfill(row_bytes * 8)
+                    self.assertEqual(
+                        bits[: matrix.size], "".join(str(m & 1) for m in row)
+                    )
+                    self.assertEqual(bits[matrix.size :].strip("0"), "")
+
+
+class ModuleImageTestCase(SimpleTestCase):
+    """Both ways of drawing the modules must match the image of segno."""
+
+    def tearDown(self):
+        """Detect numpy again for the following tests."""
+        _numpy.cache_clear()
+
+    def assert_same_as_segno(self):
+        """Compare the module images of all data with segno.to_pil()."""
+        for data in DATA:
+            with self.subTest(data=data, numpy=_numpy() is not None):
+                expected = segno.make(data, error="H").to_pil(
+                    scale=QR_SCALE, border=QR_BORDER
+                )
+                img = qr_module_image(encode_qr(data, "H"))
+                self.assertEqual(img.mode, "L")
+                self.assertEqual(img.size, expected.size)
+                self.assertEqual(img.tobytes(), expected.convert("L").tobytes())
+
+    def test_numpy(self):
+        """Draw the modules with numpy."""
+        if _numpy() is None:
+            self.skipTest("numpy is not installed")
+        self.assert_same_as_segno()
+
+    def test_pillow(self):
+        """Draw the modules with Pillow only."""
+        _numpy.cache_clear()
+        with mock.patch.dict("sys.modules", {"numpy": None}):
+            self.assertIsNone(_numpy())
+            self.assert_same_as_segno()
+
+
+class SVGModulesTestCase(SimpleTestCase):
+    """The runs of the SVG path must cover exactly the dark modules."""
+
+    def test_runs(self):
+        """Draw the runs into a grid and compare it with the segno matrix."""
+        for data in DATA:
+            with self.subTest(data=data):
+                qr = segno.make(data, error="H")
+                path = svg_modules(encode_qr(data, "H"))
+                self.assertIn('transform="scale({})"'.format(QR_SCALE), path)
+                size = len(qr.matrix)
+                grid = [[0] * size for _ in range(size)]
+                runs = re.findall(r"M(\d+) (\d+)\.5h(\d+)", path)
+                for x, y, length in runs:
+                    x, y = int(x) - QR_BORDER, int(y) - QR_BORDER
+                    end = x + int(length)
+                    for module in range(x, end):
+                        self.assertEqual(grid[y][module], 0)
+                        grid[y][module] = 1
+                    # Runs are as long as possible.
+                    self.assertFalse(end < size and qr.matrix[y][end] & 1)
+                self.assertEqual(grid, [[m & 1 for m in row] for row in qr.matrix])
+
+
+class EncodeLabelTestCase(SimpleTestCase):
+    """The error level of a label depends on the text drawn over its modules."""
+
+    data = "x" * 300
+
+    def encode(self, center_text, error_level="auto"):
+        """Encode a label with the given center text and error level."""
+        config = {"font": "Roboto-Regular", "error_level": error_level}
+        return encode_label(config, QRCodeLabel(self.data, center_text, None))
+
+    def test_without_center_text(self):
+        """Without a center text the lowest level is used."""
+        self.assertEqual(self.encode(None), encode_qr(self.data, "L"))
+
+    def test_center_text(self):
+        """A center text which is drawn keeps level H."""
+        self.assertEqual(self.encode("R1"), encode_qr(self.data, "H"))
+
+    def test_center_text_too_big(self):
+        """A center text too big to be drawn does not cover any modules."""
+        self.assertEqual(self.encode("R1" * 20), encode_qr(self.data, "L"))
+
+    def test_configured_level(self):
+        """A configured error level is used as it is."""
+        for error_level in ("L", "M", "Q", "H"):
+            with self.subTest(error_level=error_level):
+                self.assertEqual(
+                    self.encode("R1", error_level), encode_qr(self.data, error_level)
+                )
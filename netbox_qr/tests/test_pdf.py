@@ -0,0 +1,98 @@
+"""Tests of streaming label sheets as PDF."""
+import re
+import struct
+import zlib
+from django.test import SimpleTestCase
+from netbox_qr.pdf import PNG_SIGNATURE, LabelSheet, PDFWriter, png_image
+
+
+def png_chunk(kind, data):
+    """Return a PNG chunk with its checksum."""
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data))
+    )
+
+
+def gray_png(width, height, color_type=0):
+    """Return a PNG of black and white stripes with 8 bit samples."""
+    row = b"\x00" + bytes(255 * (x % 2) for x in range(width))
+    rows = row * height
+    return (
+        PNG_SIGNATURE
+        + png_chunk(
+            b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+        )
+        + png_chunk(b"IDAT", zlib.compress(rows))
+        + png_chunk(b"IEND", b"")
+    )
+
+
+class PNGImageTestCase(SimpleTestCase):
+    """Reading PNG image data for embedding."""
+
+    def test_gray(self):
+        """The zlib stream of a gray PNG is copied."""
+        png = gray_png(21, 13)
+        image = png_image(png)
+        self.assertEqual((image.width, image.height, image.bits), (21, 13, 8))
+        self.assertIsNone(image.palette)
+        self.assertEqual(zlib.decompress(b"".join(image.data))[:3], b"\x00\x00\xff")
+
+    def test_unsupported(self):
+        """RGB PNGs and other files are rejected."""
+        with self.assertRaises(ValueError):
+            png_image(gray_png(4, 4, color_type=2))
+        with self.assertRaises(ValueError):
+            png_image(b"GIF89a")
+
+
+class PDFWriterTestCase(SimpleTestCase):
+    """The streamed PDF must have a correct cross-reference table."""
+
+    def write(self, pages):
+        """Write a PDF with the given number of full pages plus one label."""
+        sheet = LabelSheet("A4", 3, 2)
+        writer = PDFWriter()
+        chunks = [writer.start()]
+        for _ in range(pages):
+            chunks.append(
+                writer.page(sheet, [gray_png(21, 21)] * sheet.labels_per_page)
+            )
+        chunks.append(writer.page(sheet, [gray_png(33, 21)]))
+        chunks.append(writer.finish())
+        return b"".join(chunks)
+
+    def test_xref(self):
+        """Every object is found at the offset of the cross-reference table."""
+        pdf = self.write(2)
+        self.assertTrue(pdf.startswith(b"%PDF-1.4\n"))
+        self.assertTrue(pdf.endswith(b"%%EOF\n"))
+        startxref = int(re.search(rb"startxref\n(\d+)\n", pdf).group(1))
+        self.assertTrue(pdf[startxref:].startswith(b"xref\n"))
+        count = int(re.match(rb"xref\n0 (\d+)\n", pdf[startxref:]).group(1))
+        offsets = re.findall(rb"(\d{10}) 00000 n \n", pdf[startxref:])
+        self.assertEqual(len(offsets), count - 1)
+        for number, offset in enumerate(offsets, 1):
+            with self.subTest(number=number):
+                self.assertTrue(pdf[int(offset) :].startswith(b"%d 0 obj\n" % number))
+        self.assertIn(b"/Size %d " % count, pdf)
+
+    def test_pages(self):
+        """The page tree lists all pages and every label image is embedded."""
+        pdf = self.write(2)
+        self.assertIn(b"/Type /Pages /Kids [", pdf)
+        self.assertIn(b"/Count 3 >>", pdf)
+        self.assertEqual(pdf.count(b"/Subtype /Image"), 2 * 6 + 1)
+        self.assertEqual(pdf.count(b"/Type /Page "), 3)
+
+    def test_stream_lengths(self):
+        """The length of every stream matches its data."""
+        pdf = self.write(1)
+        for match in re.finditer(rb"/Length (\d+) >>\nstream\n", pdf):
+            length = int(match.group(1))
+            self.assertEqual(
+                pdf[match.end() + length : match.end() + length + 10], b"\nendstream"
+            )
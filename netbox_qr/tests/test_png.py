@@ -0,0 +1,81 @@
+"""Tests of reducing and compressing the PNG images of QR Codes."""
+from io import BytesIO
+from django.test import SimpleTestCase
+from PIL import Image
+from netbox_qr.netbox_qr import (
+    PNG_PROFILES,
+    PNG_STRATEGIES,
+    encode_qr,
+    pil2png,
+    png_options,
+    qr_module_image,
+    quantize,
+)
+
+
+def label_image():
+    """Return a grayscale QR Code with a gray text-like area."""
+    img = qr_module_image(encode_qr("switch-01", "H"))
+    img.paste(100, (0, 0, 10, 10))
+    img.paste(200, (10, 0, 20, 10))
+    return img
+
+
+def black_white(img):
+    """Return the pixels of an image as 0 for black and 255 for white."""
+    return img.convert("L").point(lambda value: 255 if value >= 128 else 0).tobytes()
+
+
+class QuantizeTestCase(SimpleTestCase):
+    """Reducing the colors must keep every pixel black or white."""
+
+    def test_modes(self):
+        """Quantize to both reduced modes and compare the pixels."""
+        img = label_image()
+        for mode in ("1", "P"):
+            with self.subTest(mode=mode):
+                reduced = quantize(img, mode)
+                self.assertEqual(reduced.mode, mode)
+                self.assertEqual(reduced.size, img.size)
+                self.assertEqual(black_white(reduced), black_white(img))
+
+    def test_palette(self):
+        """The palette holds black at index 0 and white at index 1."""
+        reduced = quantize(label_image(), "P")
+        self.assertEqual(reduced.getpalette()[:6], [0, 0, 0, 255, 255, 255])
+        self.assertEqual(set(reduced.tobytes()), {0, 1})
+
+    def test_unchanged(self):
+        """Grayscale and images already in the mode are returned as they are."""
+        img = label_image()
+        self.assertIs(quantize(img, "L"), img)
+        reduced = quantize(img, "1")
+        self.assertIs(quantize(reduced, "1"), reduced)
+
+    def test_png(self):
+        """The saved PNG keeps the mode and the pixels."""
+        img = label_image()
+        for mode in ("1", "L", "P"):
+            with self.subTest(mode=mode):
+                with Image.open(BytesIO(pil2png(img, {"png_mode": mode}))) as png:
+                    self.assertEqual(png.mode, mode)
+                    self.assertEqual(black_white(png), black_white(img))
+
+
+class PNGOptionsTestCase(SimpleTestCase):
+    """The configured compression overrides the profile."""
+
+    def test_profiles(self):
+        """Without overrides the options of the profile are used."""
+        for profile, options in PNG_PROFILES.items():
+            with self.subTest(profile=profile):
+                self.assertEqual(png_options({}, profile), options)
+
+    def test_overrides(self):
+        """The configured level and strategy replace those of the profile."""
+        config = {"png_compress_level": 6, "png_compress_strategy": "rle"}
+        options = png_options(config, "size")
+        self.assertEqual(options["compress_level"], 6)
+        self.assertEqual(options["compress_type"], PNG_STRATEGIES["rle"])
+        self.assertTrue(options["optimize"])
+        self.assertEqual(PNG_PROFILES["size"]["compress_level"], 9)
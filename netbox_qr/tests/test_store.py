@@ -0,0 +1,98 @@
+"""Tests of the on-disk render store."""
+import os
+import shutil
+import tempfile
+import time
+from django.test import SimpleTestCase
+from netbox_qr.store import ABANDONED_AFTER, LOW_WATERMARK, TEMPORARY, RenderStore
+
+
+def key(number):
+    """Return a store key like the sha256 of a label."""
+    return "{:064x}".format(number)
+
+
+class RenderStoreTestCase(SimpleTestCase):
+    """Storing files and deleting the least recently used ones."""
+
+    def setUp(self):
+        """Create an empty store of 1000 bytes."""
+        self.directory = tempfile.mkdtemp()
+        self.store = RenderStore(self.directory, 1000)
+
+    def tearDown(self):
+        """Delete the store."""
+        self.wait()
+        shutil.rmtree(self.directory)
+
+    def wait(self):
+        """Wait for the background collection."""
+        collector = self.store.collector
+        if collector is not None:
+            collector.join()
+
+    def put(self, number, content, age):
+        """Store content and make it look last used age seconds ago."""
+        self.store.put(key(number), "png", content)
+        self.wait()
+        used = time.time() - age
+        os.utime(self.store.path(key(number), "png"), (used, used))
+
+    def test_put_open(self):
+        """Stored files are found by key and replaced atomically."""
+        self.assertIsNone(self.store.open(key(1), "png"))
+        self.assertFalse(self.store.contains(key(1), "png"))
+        self.store.put(key(1), "png", b"first")
+        self.store.put(key(1), "png", b"second")
+        self.assertTrue(self.store.contains(key(1), "png"))
+        self.assertFalse(self.store.contains(key(1), "svg"))
+        with self.store.open(key(1), "png") as file:
+            self.assertEqual(file.read(), b"second")
+        path = self.store.path(key(1), "png")
+        self.assertEqual(
+            os.path.relpath(path, self.directory),
+            os.path.join(key(1)[:2], key(1)[2:4], key(1) + ".png"),
+        )
+
+    def test_open_marks_used(self):
+        """Opening a file not used for long updates its modification time."""
+        self.put(1, b"x", 10000)
+        self.store.open(key(1), "png").close()
+        age = time.time() - os.stat(self.store.path(key(1), "png")).st_mtime
+        self.assertLess(age, 100)
+
+    def test_collect(self):
+        """The least recently used files are deleted down to the low watermark."""
+        for number in range(15):
+            self.put(number, b"x" * 100, 10000 - number)
+        self.store.collect()
+        self.assertLessEqual(self.store.size, 1000 * LOW_WATERMARK)
+        self.assertEqual(self.store.size, self.store.disk_usage())
+        kept = [n for n in range(15) if self.store.contains(key(n), "png")]
+        self.assertEqual(kept, list(range(15 - len(kept), 15)))
+
+    def test_collect_in_background(self):
+        """A full store is collected by put without a call to collect."""
+        for number in range(15):
+            self.put(number, b"x" * 100, 10000 - number)
+        self.assertLessEqual(self.store.disk_usage(), 1000)
+        self.assertFalse(self.store.contains(key(0), "png"))
+        self.assertTrue(self.store.contains(key(14), "png"))
+
+    def test_temporary_files(self):
+        """Files being written are not counted, abandoned ones are deleted."""
+        directory = os.path.join(self.directory, "00", "00")
+        os.makedirs(directory)
+        writing = os.path.join(directory, "writing" + TEMPORARY)
+        abandoned = os.path.join(directory, "abandoned" + TEMPORARY)
+        for path in (writing, abandoned):
+            with open(path, "wb") as file:
+                file.write(b"x" * 5000)
+        old = time.time() - ABANDONED_AFTER - 1
+        os.utime(abandoned, (old, old))
+        self.put(1, b"x" * 100, 0)
+        self.store.collect()
+        self.assertEqual(self.store.disk_usage(), 100)
+        self.assertTrue(os.path.exists(writing))
+        self.assertFalse(os.path.exists(abandoned))
+        self.assertTrue(self.store.contains(key(1), "png"))
@@ -0,0 +1,38 @@
+"""URL routes of the netbox_qr plugin."""
+from django.conf import settings
+from django.urls import path
+from . import async_views, views
+
+# With async_render, images are rendered in a thread pool instead of the request.
+if settings.PLUGINS_CONFIG.get("netbox_qr", {}).get("async_render"):
+    qrcode_image_view = async_views.qrcode_image
+else:
+    qrcode_image_view = views.QRCodeImageView.as_view()
+
+urlpatterns = [
+    path(
+        "<str:model>/<int:pk>.<str:image_format>",
+        qrcode_image_view,
+        name="qrcode_image",
+    ),
+    path(
+        "<str:model>/images/",
+        async_views.qrcode_images,
+        name="qrcode_images",
+    ),
+    path(
+        "<str:model>/labels/",
+        views.QRCodeLabelsView.as_view(),
+        name="qrcode_labels",
+    ),
+    path(
+        "exports/<str:job_id>/",
+        views.ExportStatusView.as_view(),
+        name="export_status",
+    ),
+    path(
+        "exports/<str:job_id>/download/",
+        views.ExportDownloadView.as_view(),
+        name="export_download",
+    ),
+]
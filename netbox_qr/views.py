@@ -0,0 +1,314 @@
+"""Views of the netbox_qr plugin."""
+import secrets
+from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.generic import View
+import django_rq
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+from .cache import render_key
+from .jobs import export_labels_job
+from .labels import LABEL_FORMATS, export_labels
+from .metrics import stage_timer
+from .prefetch import iterate_planned
+from .render import (
+    IMAGE_FORMATS,
+    ImageRequest,
+    keep_image,
+    lookup_image,
+    model_config,
+    qrcode_data,
+    render_image,
+)
+from .template_content import get_supported_model
+
+# Query parameters of the label views, which are not passed to the filterset.
+LABEL_PARAMETERS = ("format", "with_text", "text_below", "background")
+# Parameters of the bulk image views, which are not passed to the filterset.
+BULK_PARAMETERS = LABEL_PARAMETERS + ("image_format", "output")
+# Name of the export job function, as stored by RQ.
+EXPORT_JOB = export_labels_job.__module__ + "." + export_labels_job.__name__
+# Session key of the token identifying the exports of anonymous users.
+EXPORT_OWNER_SESSION_KEY = "netbox_qr_export_owner"
+
+
+def get_filterset(model_class):
+    """Return the NetBox filterset of a model."""
+    try:
+        from dcim import filtersets  # pylint:disable=import-outside-toplevel
+    except ImportError:
+        # NetBox before 3.0 calls the module filters.
+        from dcim import filters as filtersets  # pylint:disable=import-outside-toplevel
+    return getattr(filtersets, model_class._meta.object_name + "FilterSet")
+
+
+def filter_objects(request, model_class, parameters, ignored=LABEL_PARAMETERS):
+    """Return the filterset of the objects the user may view.
+
+    The ignored parameters are not passed to the filterset. Check is_valid()
+    before using its queryset, invalid filters are dropped silently.
+    """
+    filter_params = parameters.copy()
+    for parameter in ignored:
+        filter_params.pop(parameter, None)
+    return get_filterset(model_class)(
+        filter_params, model_class.objects.restrict(request.user, "view")
+    )
+
+
+class InvalidSelection(Exception):
+    """The parameters of a bulk request do not select QR Codes to render.
+
+    The argument are the errors, by parameter or as a list of messages.
+    """
+
+
+def bulk_image_format(config, parameters):
+    """Return the image format of a bulk request, by default the configured one."""
+    image_format = parameters.get("image_format", config.get("image_format"))
+    if image_format not in IMAGE_FORMATS:
+        raise InvalidSelection({"image_format": ["Must be png or svg."]})
+    return image_format
+
+
+def select_objects(request, model_class, config, parameters):
+    """Return the queryset and the number of the objects of a bulk request.
+
+    Raises InvalidSelection for invalid filters and if more than
+    api_max_objects objects are selected.
+    """
+    filterset = filter_objects(request, model_class, parameters, BULK_PARAMETERS)
+    if not filterset.is_valid():
+        raise InvalidSelection(
+            {name: list(errors) for name, errors in filterset.errors.items()}
+        )
+    queryset = filterset.qs
+    count = queryset.count()
+    if count > config.get("api_max_objects"):
+        raise InvalidSelection(
+            [
+                "{} objects selected, at most {} are rendered per request.".format(
+                    count, config.get("api_max_objects")
+                )
+            ]
+        )
+    return queryset, count
+
+
+def image_request(request, model, pk, image_format):
+    """Look up the object of a QR Code image request and its cache key."""
+    model_class = get_supported_model(model)
+    config = model_config(model)
+    if model_class is None or config is None or image_format not in IMAGE_FORMATS:
+        raise Http404
+    obj = get_object_or_404(model_class.objects.restrict(request.user, "view"), pk=pk)
+    with_text = request.GET.get("with_text") == "true"
+    text_below = request.GET.get("text_below") == "true"
+
+    url = request.build_absolute_uri(obj.get_absolute_url())
+    with stage_timer(model, with_text, text_below)("data"):
+        qrcodedata = qrcode_data(config, obj, url)
+    cache_key = render_key(obj, qrcodedata, config, with_text, text_below, image_format)
+
+    # The cache key changes with everything the image is rendered from.
+    etag = quote_etag(cache_key.rsplit(":", 1)[-1])
+    last_modified = None
+    if getattr(obj, "last_updated", None):
+        last_modified = int(obj.last_updated.timestamp())
+    return ImageRequest(
+        config,
+        obj,
+        qrcodedata,
+        cache_key,
+        with_text,
+        text_below,
+        image_format,
+        etag,
+        last_modified,
+    )
+
+
+def image_headers(response, image):
+    """Add the validators and the cache lifetime to the response of an image."""
+    response["ETag"] = image.etag
+    if image.last_modified is not None:
+        response["Last-Modified"] = http_date(image.last_modified)
+    patch_cache_control(
+        response, private=True, max_age=image.config.get("browser_cache_timeout")
+    )
+    return response
+
+
+def body_response(body, image):
+    """Return the response for image bytes or an open file of the render store."""
+    content_type = IMAGE_FORMATS[image.image_format]
+    if isinstance(body, bytes):
+        return HttpResponse(body, content_type=content_type)
+    # The server can send the file itself, e.g. with sendfile.
+    return FileResponse(body, content_type=content_type)
+
+
+class QRCodeImageView(View):
+    """Return the QR Code of an object as PNG or SVG image."""
+
+    def get(self, request, model, pk, image_format):
+        """Render the QR Code or answer 304 if the client already has it."""
+        image = image_request(request, model, pk, image_format)
+        response = get_conditional_response(
+            request, etag=image.etag, last_modified=image.last_modified
+        )
+        if response is None:
+            body, label, key = lookup_image(image)
+            if body is None:
+                body = render_image(
+                    image.config,
+                    label,
+                    model,
+                    image.with_text,
+                    image.text_below,
+                    image.image_format,
+                )
+                keep_image(image, key, body)
+            response = body_response(body, image)
+        return image_headers(response, image)
+
+
+class QRCodeLabelsView(View):
+    """Return the QR Codes of all objects matching a filter as PDF or ZIP of PNGs.
+
+    Takes the same filter parameters as the list view of the model. Big
+    exports are rendered by a background job.
+    """
+
+    def get(self, request, model):
+        """Render the QR Codes of all filtered objects."""
+        model_class = get_supported_model(model)
+        config = model_config(model)
+        if model_class is None or config is None:
+            raise Http404
+        with_text = request.GET.get("with_text") == "true"
+        text_below = request.GET.get("text_below") == "true"
+        output_format = request.GET.get("format", "pdf")
+        if output_format not in LABEL_FORMATS:
+            return HttpResponse("Unsupported format.", status=400)
+
+        filterset = filter_objects(request, model_class, request.GET)
+        if not filterset.is_valid():
+            return JsonResponse(filterset.errors.get_json_data(), status=400)
+        queryset = filterset.qs
+        if not queryset.exists():
+            raise Http404("No objects found.")
+        base_url = request.build_absolute_uri("/")
+
+        if request.GET.get("background") == "true" or queryset.count() > config.get(
+            "background_threshold"
+        ):
+            job = django_rq.get_queue("default").enqueue(
+                export_labels_job,
+                args=(
+                    model,
+                    list(queryset.values_list("pk", flat=True)),
+                    base_url,
+                    with_text,
+                    text_below,
+                    output_format,
+                ),
+                job_timeout=config.get("export_job_timeout"),
+                result_ttl=config.get("export_retention"),
+                meta={"owner": export_owner(request)},
+            )
+            return redirect("plugins:netbox_qr:export_status", job_id=job.id)
+
+        response = StreamingHttpResponse(
+            export_labels(
+                config,
+                iterate_planned(queryset, config),
+                base_url,
+                model,
+                with_text,
+                text_below,
+                output_format,
+            ),
+            content_type=LABEL_FORMATS[output_format],
+        )
+        response["Content-Disposition"] = 'attachment; filename="qr-{}.{}"'.format(
+            model, output_format
+        )
+        return response
+
+
+def export_owner(request):
+    """Return the owner of the export jobs started by a request.
+
+    Anonymous users all share the same pk, they are told apart by a random
+    token in their session.
+    """
+    if request.user.is_authenticated:
+        return "user:{}".format(request.user.pk)
+    token = request.session.get(EXPORT_OWNER_SESSION_KEY)
+    if token is None:
+        token = secrets.token_urlsafe(32)
+        request.session[EXPORT_OWNER_SESSION_KEY] = token
+    return "session:" + token
+
+
+def get_export_job(request, job_id):
+    """Return the export job with the given id, if it belongs to the user."""
+    try:
+        job = Job.fetch(job_id, connection=django_rq.get_connection("default"))
+    except NoSuchJobError:
+        raise Http404  # pylint:disable=raise-missing-from
+    owner = job.meta.get("owner")
+    if (
+        job.func_name != EXPORT_JOB
+        or owner is None
+        or not secrets.compare_digest(owner, export_owner(request))
+    ):
+        raise Http404
+    return job
+
+
+class ExportStatusView(View):
+    """Report the progress of a label export job."""
+
+    def get(self, request, job_id):
+        """Return status, progress and the download link when finished."""
+        job = get_export_job(request, job_id)
+        download = None
+        if job.is_finished:
+            download = request.build_absolute_uri(
+                reverse("plugins:netbox_qr:export_download", kwargs={"job_id": job.id})
+            )
+        return JsonResponse(
+            {
+                "status": job.get_status(),
+                "progress": job.meta.get("progress"),
+                "download": download,
+            }
+        )
+
+
+class ExportDownloadView(View):
+    """Download the file of a finished label export job."""
+
+    def get(self, request, job_id):
+        """Stream the exported file."""
+        job = get_export_job(request, job_id)
+        path = job.meta.get("path")
+        if not job.is_finished or not path or not default_storage.exists(path):
+            raise Http404
+        return FileResponse(
+            default_storage.open(path, "rb"),
+            as_attachment=True,
+            filename="qr-{}".format(path.rsplit("/", 1)[-1]),
+        )
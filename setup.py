@@ -26,6 +26,10 @@ setup(
         "Pillow<9.0.0",
         "qrcode-artistic",
     ],
+    extras_require={
+        "numpy": ["numpy"],
+        "metrics": ["prometheus-client"],
+    },
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
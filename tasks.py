@@ -293,6 +293,25 @@ def bandit(context, netbox_ver=NETBOX_VER, python_ver=PYTHON_VER):
     )
 
 
+@task
+def benchmark(context, update=False, netbox_ver=NETBOX_VER, python_ver=PYTHON_VER):
+    """Run the render benchmarks and compare them against the stored baseline.
+
+    Args:
+        context (obj): Used to run specific commands
+        update (bool): Store the results as new baseline
+        netbox_ver (str): NetBox version to use to build the container
+        python_ver (str): Will use the Python version docker image to build from
+    """
+    docker = f"docker-compose -f {COMPOSE_FILE} -p {BUILD_NAME} run netbox"
+    args = " --update" if update else ""
+    context.run(
+        f'{docker} sh -c "cd /source && python benchmarks/bench_render.py{args}"',
+        env={"NETBOX_VER": netbox_ver, "PYTHON_VER": python_ver},
+        pty=True,
+    )
+
+
 @task
 def tests(context, netbox_ver=NETBOX_VER, python_ver=PYTHON_VER):
     """Run all tests for this plugin.